@@ -4,11 +4,15 @@
 from .vrchat_bones import (
     check_bone_compatibility,
     get_compatibility_warning_message,
+    format_compatibility_details,
+    CompatibilityDetails,
     VRCHAT_STANDARD_BONES
 )
 
 __all__ = [
     'check_bone_compatibility',
     'get_compatibility_warning_message', 
+    'format_compatibility_details',
+    'CompatibilityDetails',
     'VRCHAT_STANDARD_BONES'
 ]
\ No newline at end of file
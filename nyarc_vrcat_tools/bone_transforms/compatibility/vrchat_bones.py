@@ -3,6 +3,32 @@
 # Enhanced with comprehensive bone name variations from Avatar Toolkit by Team Neoneko
 # Reference: https://github.com/teamneoneko/Avatar-Toolkit/blob/Current/core/dictionaries.py
 
+import re
+import sys
+from collections import Counter
+from functools import lru_cache
+from itertools import chain
+from types import MappingProxyType
+from typing import Final
+
+# Set to True to print per-category compatibility debug output
+_DEBUG = False
+
+# Placeholder for right-side categories whose names are a mechanical mirror of the left side;
+# the list is generated from the matching '_left' category when the table is frozen below
+_MIRRORED_FROM_LEFT = None
+
+# Standalone 'l'/'L' side marker between separators (thumb_0_l, toe_index_distal.l)
+_SIDE_MARKER_RE = re.compile(r'(?<=[._])([lL])(?=$|[._\d])')
+
+def _mirror_left_names(left_names):
+    """Generate right-side bone names from left-side ones (left->right, 左->右, _l->_r, .L->.R)"""
+    mirrored = []
+    for name in left_names:
+        name = name.replace('left', 'right').replace('Left', 'Right').replace('LEFT', 'RIGHT').replace('左', '右')
+        mirrored.append(_SIDE_MARKER_RE.sub(lambda match: 'r' if match.group(1) == 'l' else 'R', name))
+    return mirrored
+
 # Standard VRChat bone sets for compatibility checking
 VRCHAT_STANDARD_BONES = {
     'core': [
@@ -513,69 +539,21 @@ VRCHAT_STANDARD_BONES = {
     ],
     
     # Right toe bones
-    'toe_little_proximal_right': [
-        'toe_little_proximal_r', 'toe_little_proximal_r', 'toe_little_proximal.r',
-        'little_toe_proximal_r', 'little_toe_proximal_r', 'littletoe_proximal_r'
-    ],
-    'toe_little_intermediate_right': [
-        'toe_little_intermediate_r', 'toe_little_intermediate_r', 'toe_little_intermediate.r',
-        'little_toe_intermediate_r', 'little_toe_intermediate_r', 'littletoe_intermediate_r'
-    ],
-    'toe_little_distal_right': [
-        'toe_little_distal_r', 'toe_little_distal_r', 'toe_little_distal.r',
-        'little_toe_distal_r', 'little_toe_distal_r', 'littletoe_distal_r'
-    ],
-    'toe_ring_proximal_right': [
-        'toe_ring_proximal_r', 'toe_ring_proximal_r', 'toe_ring_proximal.r',
-        'ring_toe_proximal_r', 'ring_toe_proximal_r', 'ringtoe_proximal_r'
-    ],
-    'toe_ring_intermediate_right': [
-        'toe_ring_intermediate_r', 'toe_ring_intermediate_r', 'toe_ring_intermediate.r',
-        'ring_toe_intermediate_r', 'ring_toe_intermediate_r', 'ringtoe_intermediate_r'
-    ],
-    'toe_ring_distal_right': [
-        'toe_ring_distal_r', 'toe_ring_distal_r', 'toe_ring_distal.r',
-        'ring_toe_distal_r', 'ring_toe_distal_r', 'ringtoe_distal_r'
-    ],
-    'toe_middle_proximal_right': [
-        'toe_middle_proximal_r', 'toe_middle_proximal_r', 'toe_middle_proximal.r',
-        'middle_toe_proximal_r', 'middle_toe_proximal_r', 'middletoe_proximal_r'
-    ],
-    'toe_middle_intermediate_right': [
-        'toe_middle_intermediate_r', 'toe_middle_intermediate_r', 'toe_middle_intermediate.r',
-        'middle_toe_intermediate_r', 'middle_toe_intermediate_r', 'middletoe_intermediate_r'
-    ],
-    'toe_middle_distal_right': [
-        'toe_middle_distal_r', 'toe_middle_distal_r', 'toe_middle_distal.r',
-        'middle_toe_distal_r', 'middle_toe_distal_r', 'middletoe_distal_r'
-    ],
-    'toe_index_proximal_right': [
-        'toe_index_proximal_r', 'toe_index_proximal_r', 'toe_index_proximal.r',
-        'index_toe_proximal_r', 'index_toe_proximal_r', 'indextoe_proximal_r'
-    ],
-    'toe_index_intermediate_right': [
-        'toe_index_intermediate_r', 'toe_index_intermediate_r', 'toe_index_intermediate.r',
-        'index_toe_intermediate_r', 'index_toe_intermediate_r', 'indextoe_intermediate_r'
-    ],
-    'toe_index_distal_right': [
-        'toe_index_distal_r', 'toe_index_distal_r', 'toe_index_distal.r',
-        'index_toe_distal_r', 'index_toe_distal_r', 'indextoe_distal_r'
-    ],
-    'toe_thumb_proximal_right': [
-        'toe_thumb_proximal_r', 'toe_thumb_proximal_r', 'toe_thumb_proximal.r',
-        'thumb_toe_proximal_r', 'thumb_toe_proximal_r', 'thumbtoe_proximal_r',
-        'big_toe_proximal_r', 'big_toe_proximal_r', 'bigtoe_proximal_r'
-    ],
-    'toe_thumb_intermediate_right': [
-        'toe_thumb_intermediate_r', 'toe_thumb_intermediate_r', 'toe_thumb_intermediate.r',
-        'thumb_toe_intermediate_r', 'thumb_toe_intermediate_r', 'thumbtoe_intermediate_r',
-        'big_toe_intermediate_r', 'big_toe_intermediate_r', 'bigtoe_intermediate_r'
-    ],
-    'toe_thumb_distal_right': [
-        'toe_thumb_distal_r', 'toe_thumb_distal_r', 'toe_thumb_distal.r',
-        'thumb_toe_distal_r', 'thumb_toe_distal_r', 'thumbtoe_distal_r',
-        'big_toe_distal_r', 'big_toe_distal_r', 'bigtoe_distal_r'
-    ],
+    'toe_little_proximal_right': _MIRRORED_FROM_LEFT,
+    'toe_little_intermediate_right': _MIRRORED_FROM_LEFT,
+    'toe_little_distal_right': _MIRRORED_FROM_LEFT,
+    'toe_ring_proximal_right': _MIRRORED_FROM_LEFT,
+    'toe_ring_intermediate_right': _MIRRORED_FROM_LEFT,
+    'toe_ring_distal_right': _MIRRORED_FROM_LEFT,
+    'toe_middle_proximal_right': _MIRRORED_FROM_LEFT,
+    'toe_middle_intermediate_right': _MIRRORED_FROM_LEFT,
+    'toe_middle_distal_right': _MIRRORED_FROM_LEFT,
+    'toe_index_proximal_right': _MIRRORED_FROM_LEFT,
+    'toe_index_intermediate_right': _MIRRORED_FROM_LEFT,
+    'toe_index_distal_right': _MIRRORED_FROM_LEFT,
+    'toe_thumb_proximal_right': _MIRRORED_FROM_LEFT,
+    'toe_thumb_intermediate_right': _MIRRORED_FROM_LEFT,
+    'toe_thumb_distal_right': _MIRRORED_FROM_LEFT,
     
     # Eye bones - critical for VRChat facial animation
     'eye_left': [
@@ -595,51 +573,31 @@ VRCHAT_STANDARD_BONES = {
         'thumb_0_l', 'thumb_metacarpal_l', 'thumbmetacarpal_l', 'thumb_meta_l',
         'leftthumbmetacarpal', 'left_thumb_metacarpal'
     ],
-    'thumb_metacarpal_right': [
-        'thumb_0_r', 'thumb_metacarpal_r', 'thumb_0.r', 'thumb_metacarpal.r',
-        'thumb_0_r', 'thumb_metacarpal_r', 'thumbmetacarpal_r', 'thumb_meta_r',
-        'rightthumbmetacarpal', 'right_thumb_metacarpal'
-    ],
+    'thumb_metacarpal_right': _MIRRORED_FROM_LEFT,
     'index_metacarpal_left': [
         'index_0_l', 'index_metacarpal_l', 'index_0.l', 'index_metacarpal.l',
         'index_0_l', 'index_metacarpal_l', 'indexmetacarpal_l', 'index_meta_l',
         'leftindexmetacarpal', 'left_index_metacarpal'
     ],
-    'index_metacarpal_right': [
-        'index_0_r', 'index_metacarpal_r', 'index_0.r', 'index_metacarpal.r',
-        'index_0_r', 'index_metacarpal_r', 'indexmetacarpal_r', 'index_meta_r',
-        'rightindexmetacarpal', 'right_index_metacarpal'
-    ],
+    'index_metacarpal_right': _MIRRORED_FROM_LEFT,
     'middle_metacarpal_left': [
         'middle_0_l', 'middle_metacarpal_l', 'middle_0.l', 'middle_metacarpal.l',
         'middle_0_l', 'middle_metacarpal_l', 'middlemetacarpal_l', 'middle_meta_l',
         'leftmiddlemetacarpal', 'left_middle_metacarpal'
     ],
-    'middle_metacarpal_right': [
-        'middle_0_r', 'middle_metacarpal_r', 'middle_0.r', 'middle_metacarpal.r',
-        'middle_0_r', 'middle_metacarpal_r', 'middlemetacarpal_r', 'middle_meta_r',
-        'rightmiddlemetacarpal', 'right_middle_metacarpal'
-    ],
+    'middle_metacarpal_right': _MIRRORED_FROM_LEFT,
     'ring_metacarpal_left': [
         'ring_0_l', 'ring_metacarpal_l', 'ring_0.l', 'ring_metacarpal.l',
         'ring_0_l', 'ring_metacarpal_l', 'ringmetacarpal_l', 'ring_meta_l',
         'leftringmetacarpal', 'left_ring_metacarpal'
     ],
-    'ring_metacarpal_right': [
-        'ring_0_r', 'ring_metacarpal_r', 'ring_0.r', 'ring_metacarpal.r',
-        'ring_0_r', 'ring_metacarpal_r', 'ringmetacarpal_r', 'ring_meta_r',
-        'rightringmetacarpal', 'right_ring_metacarpal'
-    ],
+    'ring_metacarpal_right': _MIRRORED_FROM_LEFT,
     'pinky_metacarpal_left': [
         'pinky_0_l', 'pinky_metacarpal_l', 'pinky_0.l', 'pinky_metacarpal.l',
         'pinky_0_l', 'pinky_metacarpal_l', 'pinkymetacarpal_l', 'pinky_meta_l',
         'little_0_l', 'little_metacarpal_l', 'leftpinkymetacarpal', 'left_pinky_metacarpal'
     ],
-    'pinky_metacarpal_right': [
-        'pinky_0_r', 'pinky_metacarpal_r', 'pinky_0.r', 'pinky_metacarpal.r',
-        'pinky_0_r', 'pinky_metacarpal_r', 'pinkymetacarpal_r', 'pinky_meta_r',
-        'little_0_r', 'little_metacarpal_r', 'rightpinkymetacarpal', 'right_pinky_metacarpal'
-    ],
+    'pinky_metacarpal_right': _MIRRORED_FROM_LEFT,
     
     # Breast bones - for adult avatar compatibility
     'breast_upper_left': [
@@ -664,6 +622,25 @@ VRCHAT_STANDARD_BONES = {
     ]
 }
 
+# Mirrored right-side lists are generated here, before anything else reads the table
+VRCHAT_STANDARD_BONES = {
+    category: (standard_names if standard_names is not _MIRRORED_FROM_LEFT
+               else _mirror_left_names(VRCHAT_STANDARD_BONES[category[:-len('_right')] + '_left']))
+    for category, standard_names in VRCHAT_STANDARD_BONES.items()
+}
+
+# Alias counts as listed, duplicates included. The compatibility score divides by
+# min(alias count, preset matches), so these keep scores identical to the listed tables
+_CATEGORY_ALIAS_COUNTS = {category: len(standard_names) for category, standard_names in VRCHAT_STANDARD_BONES.items()}
+
+# Alias tables are read-only lookup data: freeze each list into a tuple of interned strings
+# (duplicates dropped, first occurrence kept) behind a read-only mapping, so the indexes
+# derived below can never go stale
+VRCHAT_STANDARD_BONES = MappingProxyType({
+    category: tuple(sys.intern(name) for name in dict.fromkeys(standard_names))
+    for category, standard_names in VRCHAT_STANDARD_BONES.items()
+})
+
 # Inheritance relationships - when parent bones change, these child categories should be checked
 BONE_INHERITANCE_CHAINS = {
     'core': ['eye_left', 'eye_right'],  # Core/head changes can affect eye bones
@@ -810,6 +787,112 @@ BONE_LOGICAL_GROUPS = {
     'all_body_extras': ['breast_upper_left', 'breast_upper_right', 'breast_lower_left', 'breast_lower_right']
 }
 
+# Freeze the relationship tables the same way (logical groups deduplicated too)
+BONE_INHERITANCE_CHAINS = MappingProxyType({
+    parent_category: tuple(child_categories)
+    for parent_category, child_categories in BONE_INHERITANCE_CHAINS.items()
+})
+FINGER_HIERARCHY = MappingProxyType({side: tuple(chains) for side, chains in FINGER_HIERARCHY.items()})
+# Group contents include names the compiler doesn't auto-intern (e.g. 'mixamorig:hips', '腰'),
+# so intern them to share objects with the alias tables
+BONE_LOGICAL_GROUPS = MappingProxyType({
+    group_name: tuple(sys.intern(name) for name in dict.fromkeys(group_content))
+    for group_name, group_content in BONE_LOGICAL_GROUPS.items()
+})
+
+def _build_alias_index():
+    """Build a flat lowercase alias -> category lookup (first category listing an alias wins)
+    Keys are interned so the lowercase tables and indexes below share one object per alias"""
+    alias_index = {}
+    for category, standard_names in VRCHAT_STANDARD_BONES.items():
+        for std_name in standard_names:
+            alias_index.setdefault(sys.intern(std_name.lower()), category)
+    return alias_index
+
+# Flat lowercase alias -> category table, built once at import
+_ALIAS_TO_CATEGORY = _build_alias_index()
+
+# Every standard bone name (original case and lowercase) for O(1) membership checks
+STANDARD_BONE_NAMES: Final = frozenset(name for standard_names in VRCHAT_STANDARD_BONES.values() for name in standard_names)
+STANDARD_BONE_NAMES_LOWER: Final = frozenset(_ALIAS_TO_CATEGORY)
+
+# Lowercase alias tuples per category, computed once instead of on every compatibility check
+VRCHAT_STANDARD_BONES_LOWER: Final = {
+    category: tuple(sys.intern(std_name.lower()) for std_name in standard_names)
+    for category, standard_names in VRCHAT_STANDARD_BONES.items()
+}
+
+# Per-category (names, lowercase names, listed alias count) so the scoring loop unpacks once per category
+_CATEGORY_META = {
+    category: (standard_names, VRCHAT_STANDARD_BONES_LOWER[category], _CATEGORY_ALIAS_COUNTS[category])
+    for category, standard_names in VRCHAT_STANDARD_BONES.items()
+}
+
+# Lowercase alias sets per category for O(1) "is this name in category X" checks
+VRCHAT_STANDARD_BONE_SETS: Final = {
+    category: frozenset(standard_names_lower)
+    for category, standard_names_lower in VRCHAT_STANDARD_BONES_LOWER.items()
+}
+
+# Lowercase core aliases for is_core_bone
+_CORE_BONES_LOWER = VRCHAT_STANDARD_BONE_SETS.get('core', frozenset())
+
+def _build_alias_categories():
+    """Build an inverted index: lowercase alias -> every category listing it"""
+    alias_categories = {}
+    for category, standard_names_lower in VRCHAT_STANDARD_BONES_LOWER.items():
+        for std_name in standard_names_lower:
+            categories = alias_categories.setdefault(std_name, [])
+            if category not in categories:
+                categories.append(category)
+    return {std_name: tuple(categories) for std_name, categories in alias_categories.items()}
+
+# Inverted alias index - any substring of a bone name is checked with one dict probe
+_ALIAS_TO_CATEGORIES = _build_alias_categories()
+
+# Heavier derived indexes below are built on first use (lru_cache) rather than at import,
+# so add-on registration and UI-only code paths don't pay for them
+
+@lru_cache(maxsize=None)
+def _alias_trie():
+    """Build a character trie over the lowercase aliases (dict of dicts).
+    A node's None key holds the categories of the alias ending there."""
+    trie = {}
+    for alias, categories in _ALIAS_TO_CATEGORIES.items():
+        node = trie
+        for char in alias:
+            node = node.setdefault(char, {})
+        node[None] = categories
+    return trie
+
+# Per category: (category, longest alias length, all aliases joined by NUL). A bone name never
+# contains NUL, so "bone in haystack" is exactly "bone in any alias" as a single C-level search
+_CATEGORY_HAYSTACKS = tuple(
+    (category, max(map(len, standard_names_lower), default=0), '\0'.join(standard_names_lower))
+    for category, standard_names_lower in VRCHAT_STANDARD_BONES_LOWER.items()
+)
+
+def _expand_logical_group(group_content):
+    """Expand category references in a logical group into their bone names"""
+    # If first item is a category name, expand categories
+    if group_content and isinstance(group_content[0], str) and group_content[0] in VRCHAT_STANDARD_BONES:
+        all_bones = []
+        for item in group_content:
+            if item in VRCHAT_STANDARD_BONES:
+                all_bones.extend(VRCHAT_STANDARD_BONES[item])
+            else:
+                all_bones.append(item)  # Direct bone name
+        # Categories in one group can share aliases - keep the first occurrence only
+        return tuple(dict.fromkeys(all_bones))
+    # Direct list of bone names
+    return tuple(group_content)
+
+# Logical groups with category references already expanded, so lookups are a single dict probe
+_LOGICAL_GROUPS_EXPANDED = {
+    group_name: _expand_logical_group(group_content)
+    for group_name, group_content in BONE_LOGICAL_GROUPS.items()
+}
+
 def get_bones_by_logical_group(group_name):
     """
     Get all bone names from a logical group of categories.
@@ -819,28 +902,9 @@ def get_bones_by_logical_group(group_name):
         group_name (str): Name of the logical group
         
     Returns:
-        list: All bone names from the specified group
+        tuple: All bone names from the specified group (shared, read-only)
     """
-    if group_name not in BONE_LOGICAL_GROUPS:
-        return []
-    
-    # Handle category references vs direct bone lists
-    group_content = BONE_LOGICAL_GROUPS[group_name]
-    if not group_content:
-        return []
-        
-    # If first item is a category name, expand categories
-    if isinstance(group_content[0], str) and group_content[0] in VRCHAT_STANDARD_BONES:
-        all_bones = []
-        for item in group_content:
-            if item in VRCHAT_STANDARD_BONES:
-                all_bones.extend(VRCHAT_STANDARD_BONES[item])
-            else:
-                all_bones.append(item)  # Direct bone name
-        return all_bones
-    else:
-        # Direct list of bone names
-        return group_content
+    return _LOGICAL_GROUPS_EXPANDED.get(group_name, ())
 
 def get_core_bone_subgroup(subgroup):
     """
@@ -854,7 +918,7 @@ def get_core_bone_subgroup(subgroup):
     """
     subgroup_key = f'core_{subgroup}'
     if subgroup_key in BONE_LOGICAL_GROUPS:
-        return BONE_LOGICAL_GROUPS[subgroup_key]
+        return list(BONE_LOGICAL_GROUPS[subgroup_key])
     return []
 
 def get_all_core_bones():
@@ -865,7 +929,22 @@ def get_all_core_bones():
     Returns:
         list: All core bone name variations
     """
-    return VRCHAT_STANDARD_BONES.get('core', [])
+    return list(VRCHAT_STANDARD_BONES.get('core', ()))
+
+def is_bone_in_category(bone_name, category):
+    """
+    Check if a bone name is one of a category's standard names (exact, case-insensitive).
+    
+    Args:
+        bone_name (str): The bone name to check
+        category (str): VRChat standard bone category
+        
+    Returns:
+        bool: True if the name is listed in the category
+    """
+    if not bone_name:
+        return False
+    return bone_name.lower() in VRCHAT_STANDARD_BONE_SETS.get(category, ())
 
 def is_core_bone(bone_name):
     """
@@ -882,131 +961,246 @@ def is_core_bone(bone_name):
         return False
     
     bone_lower = bone_name.lower()
-    core_bones = get_all_core_bones()
-    core_bones_lower = [std_name.lower() for std_name in core_bones]
-    return any(std_name in bone_lower or bone_lower in std_name 
-              for std_name in core_bones_lower)
+    
+    # Exact alias match is a set probe
+    if bone_lower in _CORE_BONES_LOWER:
+        return True
+    
+    # Substring match goes through the shared (cached) category hits: the alias trie
+    # for aliases inside the bone name, the per-category haystacks for the bone inside an alias
+    return 'core' in _bone_category_hits(bone_lower)
+
+@lru_cache(maxsize=4096)
+def _bone_category_hits(bone_lower):
+    """
+    Find every category with an alias contained in (or containing) a lowercase bone name.
+    One pass per bone instead of one pass per (bone, category) check; cached because
+    the same bone names come back on every check against the same armature.
+    
+    Args:
+        bone_lower (str): Lowercase bone name
+        
+    Returns:
+        frozenset: Matching category names
+    """
+    hits = set()
+    bone_length = len(bone_lower)
+    
+    # Alias contained in bone: walk the alias trie from each start offset
+    # until no alias continues the prefix
+    trie = _alias_trie()
+    for start in range(bone_length):
+        node = trie
+        for char in bone_lower[start:]:
+            node = node.get(char)
+            if node is None:
+                break
+            categories = node.get(None)
+            if categories:
+                hits.update(categories)
+    
+    # Bone contained in alias: one haystack search per category not matched yet
+    for category, max_alias_length, haystack in _CATEGORY_HAYSTACKS:
+        if bone_length <= max_alias_length and category not in hits and bone_lower in haystack:
+            hits.add(category)
+    
+    return frozenset(hits)
+
+@lru_cache(maxsize=128)
+def _preset_category_counts(preset_key):
+    """
+    Count preset bones per category. Presets are reused across armatures, so the
+    result is cached on the preset's sorted lowercase bone names.
+    
+    Args:
+        preset_key (tuple): Sorted lowercase preset bone names (duplicates kept)
+        
+    Returns:
+        tuple: (category, count) pairs for categories the preset touches
+    """
+    # One C-level count over every bone's hits instead of a Counter.update per bone
+    preset_category_counts = Counter(chain.from_iterable(map(_bone_category_hits, preset_key)))
+    return tuple((category, preset_category_counts[category])
+                 for category in VRCHAT_STANDARD_BONES if preset_category_counts[category] > 0)
+
+def format_compatibility_details(records):
+    """
+    Format per-category compatibility records into the summary string.
+    
+    Args:
+        records (iterable): (category, is_direct, armature_matches, preset_matches) tuples
+        
+    Returns:
+        str: "; "-joined per-category match summary
+    """
+    return "; ".join(
+        f"{category} {'(direct)' if is_direct else '(inheritance)'}: {armature_matches} arm / {preset_matches} preset matches"
+        for category, is_direct, armature_matches, preset_matches in records
+    )
+
+class CompatibilityDetails(tuple):
+    """Per-category compatibility records; only formatted into text when converted with str().
+    Checks that end before any category is scored carry a fixed note and no records."""
+    
+    def __new__(cls, records=(), note=None):
+        details = super().__new__(cls, records)
+        details.note = note
+        return details
+    
+    def __str__(self):
+        if self.note is not None:
+            return self.note
+        return format_compatibility_details(self)
+
+@lru_cache(maxsize=32)
+def _armature_category_counts(armature_key):
+    """
+    Count armature bones per category. The caller rebuilds the bone name list on
+    every check, so the result is cached on its contents rather than its identity.
+    
+    Args:
+        armature_key (tuple): Sorted lowercase armature bone names (duplicates kept)
+        
+    Returns:
+        tuple: (category, count) pairs for categories the armature has bones in
+    """
+    armature_category_counts = Counter(chain.from_iterable(map(_bone_category_hits, armature_key)))
+    return tuple(armature_category_counts.items())
 
 def check_bone_compatibility(armature_bones, preset_bones):
     """
     SMART compatibility check - only checks categories relevant to the preset
     Returns: (compatibility_score, missing_categories, details)
+    details is always a CompatibilityDetails record tuple; str(details) gives the summary text
     """
     if not armature_bones or not preset_bones:
-        return 0.0, [], "No bones to compare"
+        return 0.0, [], CompatibilityDetails(note="No bones to compare")
     
-    # Convert to lowercase for fuzzy matching
-    armature_lower = [bone.lower() for bone in armature_bones]
-    preset_lower = [bone.lower() for bone in preset_bones]
+    # Convert to lowercase for fuzzy matching; sorted so bone order never affects caching
+    preset_key = tuple(sorted(bone.lower() for bone in preset_bones))
+    armature_key = tuple(sorted(bone.lower() for bone in armature_bones))
     
-    # SMART DETECTION: Find which categories are actually relevant to this preset
-    relevant_categories = {}
-    for category, standard_names in VRCHAT_STANDARD_BONES.items():
-        # Convert standard names to lowercase for case-insensitive matching
-        standard_names_lower = [std_name.lower() for std_name in standard_names]
-        
-        # Check if preset contains bones from this category (case-insensitive)
-        preset_matches_in_category = sum(1 for bone in preset_lower 
-                                       if any(std_name in bone or bone in std_name for std_name in standard_names_lower))
+    # Per-bone-list category counts are cached on these keys, so repeated loads skip classification
+    compatibility_score, missing_categories, details = _compute_bone_compatibility(armature_key, preset_key)
+    return compatibility_score, list(missing_categories), details
+
+def clear_compatibility_cache():
+    """Drop every memoized per-bone-list count and per-bone category hit"""
+    _armature_category_counts.cache_clear()
+    _preset_category_counts.cache_clear()
+    _bone_category_hits.cache_clear()
+
+def _compute_bone_compatibility(armature_key, preset_key):
+    """
+    Compatibility check body for check_bone_compatibility.
+    
+    Args:
+        armature_key (tuple): Sorted lowercase armature bone names (duplicates kept)
+        preset_key (tuple): Sorted lowercase preset bone names (duplicates kept)
         
-        if preset_matches_in_category > 0:
-            relevant_categories[category] = standard_names
-            print(f"DEBUG: Category '{category}' is relevant - preset has {preset_matches_in_category} bones from this category")
-        else:
-            print(f"DEBUG: Category '{category}' is NOT relevant - preset has no bones from this category")
+    Returns:
+        tuple: (compatibility_score, missing_categories tuple, details)
+    """
+    # Per-category preset bone counts (cached per preset); reused for scoring below
+    preset_category_counts = dict(_preset_category_counts(preset_key))
+    
+    # Classify each armature bone once against all categories (cached per armature bone list)
+    armature_category_counts = dict(_armature_category_counts(armature_key))
+    
+    # SMART DETECTION: Find which categories are actually relevant to this preset
+    # The cached preset counts only list categories with bones, already in table order
+    relevant_categories = preset_category_counts
+    if _DEBUG:
+        for category in VRCHAT_STANDARD_BONES:
+            if category in relevant_categories:
+                print(f"DEBUG: Category '{category}' is relevant - preset has {relevant_categories[category]} bones from this category")
+            else:
+                print(f"DEBUG: Category '{category}' is NOT relevant - preset has no bones from this category")
     
     # INHERITANCE CHECK: Add child categories that will be affected by parent bone changes
-    inheritance_categories = {}
-    for parent_category in relevant_categories.keys():
-        if parent_category in BONE_INHERITANCE_CHAINS:
-            child_categories = BONE_INHERITANCE_CHAINS[parent_category]
-            for child_category in child_categories:
-                if child_category not in relevant_categories:  # Don't duplicate if already relevant
-                    inheritance_categories[child_category] = VRCHAT_STANDARD_BONES[child_category]
-                    print(f"DEBUG: Category '{child_category}' added due to inheritance from '{parent_category}'")
-    
-    # Combine relevant and inheritance categories
-    all_relevant_categories = {**relevant_categories, **inheritance_categories}
-    
-    if not all_relevant_categories:
-        print("DEBUG: No relevant categories found, using fallback compatibility check")
-        return 1.0, [], "Preset uses custom bone names - compatibility check not applicable"
+    # Built as an ordered set (dict keys) minus the relevant ones, so reports keep a stable order
+    inheritance_categories = dict.fromkeys(
+        child_category
+        for parent_category in relevant_categories
+        for child_category in BONE_INHERITANCE_CHAINS.get(parent_category, ())
+        if child_category not in relevant_categories  # Don't duplicate if already relevant
+    )
+    if _DEBUG:
+        for child_category in inheritance_categories:
+            print(f"DEBUG: Category '{child_category}' added due to inheritance")
+    
+    if not relevant_categories and not inheritance_categories:
+        if _DEBUG:
+            print("DEBUG: No relevant categories found, using fallback compatibility check")
+        return 1.0, (), CompatibilityDetails(note="Preset uses custom bone names - compatibility check not applicable")
     
     # Check all relevant categories (both direct and inheritance)
-    category_results = {}
+    category_records = []
     missing_categories = []
+    direct_score_sum = 0.0
+    inheritance_score_sum = 0.0
     
-    for category, standard_names in all_relevant_categories.items():
-        # Convert standard names to lowercase for case-insensitive matching
-        standard_names_lower = [std_name.lower() for std_name in standard_names]
+    # Relevant and inheritance categories never overlap, so chain them instead of merging
+    for category in chain(relevant_categories, inheritance_categories):
+        preset_matches = preset_category_counts.get(category, 0)
+        # How many armature bones belong to this category (case-insensitive)
+        armature_matches = armature_category_counts.get(category, 0)
+        is_inheritance = category in inheritance_categories
         
-        # Check how many bones from this category exist in both sets (case-insensitive)
-        armature_matches = sum(1 for bone in armature_lower 
-                             if any(std_name in bone or bone in std_name for std_name in standard_names_lower))
-        preset_matches = sum(1 for bone in preset_lower 
-                           if any(std_name in bone or bone in std_name for std_name in standard_names_lower))
-        
-        # Different scoring logic for direct vs inheritance categories
-        if category in inheritance_categories:
-            # INHERITANCE CATEGORIES: Don't penalize score when preset has no bones from this category
-            # This is expected for focused presets (e.g., elbow-only shouldn't be penalized for no finger bones)
-            if preset_matches == 0:
-                category_score = 1.0  # Perfect score - no expectation of bones in this category
+        # INHERITANCE CATEGORIES: Don't penalize score when preset has no bones from this category
+        # This is expected for focused presets (e.g., elbow-only shouldn't be penalized for no finger bones)
+        if is_inheritance and preset_matches == 0:
+            if _DEBUG:
                 print(f"DEBUG: {category} (inheritance) compatibility: 1.00 - OK (no bones expected in focused preset)")
-            else:
-                # If preset does have bones from inheritance category, check normally
-                min_expected = min(len(standard_names), preset_matches)
-                if min_expected == 0:
-                    min_expected = 1
-                category_score = min(armature_matches, preset_matches) / min_expected
-                
-                if category_score < 0.3:  # Lower threshold for inherited effects
-                    missing_categories.append(category)
+            category_records.append((category, False, armature_matches, preset_matches))
+            inheritance_score_sum += 1.0  # Perfect score - no expectation of bones in this category
+            continue
+        
+        # Alias count (as listed, duplicates included) is precomputed per category
+        min_expected = min(_CATEGORY_META[category][2], preset_matches) or 1
+        category_score = min(armature_matches, preset_matches) / min_expected
+        
+        # Different thresholds for direct vs inheritance categories
+        if is_inheritance:
+            inheritance_score_sum += category_score
+            # If preset does have bones from inheritance category, check normally
+            if category_score < 0.3:  # Lower threshold for inherited effects
+                missing_categories.append(category)
+                if _DEBUG:
                     print(f"DEBUG: {category} (inheritance) compatibility: {category_score:.2f} - MISSING")
-                else:
-                    print(f"DEBUG: {category} (inheritance) compatibility: {category_score:.2f} - OK")
+            elif _DEBUG:
+                print(f"DEBUG: {category} (inheritance) compatibility: {category_score:.2f} - OK")
         else:
-            # DIRECT CATEGORIES: Standard scoring for bones actually in preset
-            min_expected = min(len(standard_names), preset_matches)
-            if min_expected == 0:
-                min_expected = 1
-                
-            category_score = min(armature_matches, preset_matches) / min_expected
-            
-            # Standard threshold for direct categories (bones actually in preset)  
+            # DIRECT CATEGORIES: Standard threshold for bones actually in preset
+            direct_score_sum += category_score
             if category_score < 0.7:  # Higher threshold for direct bone matches
                 missing_categories.append(category)
-                print(f"DEBUG: {category} (direct) compatibility: {category_score:.2f} - MISSING")
-            else:
+                if _DEBUG:
+                    print(f"DEBUG: {category} (direct) compatibility: {category_score:.2f} - MISSING")
+            elif _DEBUG:
                 print(f"DEBUG: {category} (direct) compatibility: {category_score:.2f} - OK")
         
-        category_results[category] = {
-            'score': category_score,
-            'armature_matches': armature_matches,
-            'preset_matches': preset_matches
-        }
+        category_records.append((category, not is_inheritance, armature_matches, preset_matches))
     
     # Calculate overall compatibility score (weighted: direct categories count more)
-    direct_scores = [result['score'] for cat, result in category_results.items() if cat in relevant_categories]
-    inheritance_scores = [result['score'] for cat, result in category_results.items() if cat in inheritance_categories]
+    # Every direct and inheritance category was scored once above
+    direct_count = len(relevant_categories)
+    inheritance_count = len(inheritance_categories)
     
     # Use weighted average: direct categories weight=2, inheritance categories weight=1
-    total_weighted_score = sum(score * 2 for score in direct_scores) + sum(score * 1 for score in inheritance_scores)
-    total_weight = len(direct_scores) * 2 + len(inheritance_scores) * 1
+    total_weighted_score = direct_score_sum * 2 + inheritance_score_sum
+    total_weight = direct_count * 2 + inheritance_count
     
     if total_weight > 0:
         compatibility_score = total_weighted_score / total_weight
     else:
         compatibility_score = 0.0
     
-    # Generate details string
-    details = []
-    for category, result in category_results.items():
-        category_type = "(direct)" if category in relevant_categories else "(inheritance)"
-        details.append(f"{category} {category_type}: {result['armature_matches']} arm / {result['preset_matches']} preset matches")
+    if _DEBUG:
+        print(f"DEBUG: Smart compatibility result: {compatibility_score:.2f} based on {direct_count} direct + {inheritance_count} inheritance categories")
     
-    print(f"DEBUG: Smart compatibility result: {compatibility_score:.2f} based on {len(direct_scores)} direct + {len(inheritance_scores)} inheritance categories")
-    return compatibility_score, missing_categories, "; ".join(details)
+    # Details are formatted lazily - callers that only need the score never build the string
+    return compatibility_score, tuple(missing_categories), CompatibilityDetails(category_records)
 
 def get_compatibility_warning_message(compatibility_score, missing_categories, armature_name, preset_name):
     """Generate user-friendly warning message based on compatibility check"""
@@ -5,9 +5,17 @@
 import bpy
 import json
 import os
+import re
+from math import sqrt
 from mathutils import Vector, Quaternion, Matrix
 import bmesh
 
+# Blender's duplicate-name suffix (.001, .002, .003, etc.)
+_BLENDER_SUFFIX_RE = re.compile(r'\.\d{3}$')
+
+# Per-bone debug output - printing to Blender's console for every bone is slow on large armatures
+_DEBUG = False
+
 def should_skip_xz_scaling_analysis(bone_name):
     """
     Determine if X/Z scaling analysis should be skipped for this bone.
@@ -31,6 +39,64 @@ def should_skip_xz_scaling_analysis(bone_name):
     bone_lower = bone_name.lower()
     return any(problem in bone_lower for problem in problematic_bones)
 
+def _exclusive_weight_masks(mesh_obj, target_group_index):
+    """
+    Per-vertex weight masks for one vertex group of a mesh, computed with NumPy.
+    
+    Vertex group weights have no foreach_get access, so they are flattened into
+    (vertex, group, weight) rows in a single pass and every test runs over arrays.
+    
+    Returns:
+        tuple: (exclusive, mixed, target_weights) - exclusive vertices have weight >= 0.99
+        for the target group and no other group above 0.01; mixed ones have the full
+        target weight plus other influences
+    """
+    vertices = mesh_obj.data.vertices
+    rows = np.array([(vertex_idx, group.group, group.weight)
+                     for vertex_idx, vertex in enumerate(vertices)
+                     for group in vertex.groups], dtype=np.float64).reshape(-1, 3)
+    vertex_ids = rows[:, 0].astype(np.intp)
+    group_ids = rows[:, 1].astype(np.intp)
+    weights = rows[:, 2]
+    
+    # Ignore entries pointing at vertex groups that no longer exist
+    valid = group_ids < len(mesh_obj.vertex_groups)
+    is_target = valid & (group_ids == target_group_index)
+    
+    target_weights = np.zeros(len(vertices), dtype=np.float64)
+    target_weights[vertex_ids[is_target]] = weights[is_target]
+    has_other = np.zeros(len(vertices), dtype=bool)
+    has_other[vertex_ids[valid & ~is_target & (weights > 0.01)]] = True
+    
+    if _DEBUG:
+        # Debug output for first few vertices
+        for vertex_idx in range(min(5, len(vertices))):
+            entries = valid & (vertex_ids == vertex_idx)
+            vertex_weights = {mesh_obj.vertex_groups[group_idx].name: weight
+                              for group_idx, weight in zip(group_ids[entries].tolist(), weights[entries].tolist())}
+            print(f"MESH DEBUG: Vertex {vertex_idx} weights: {vertex_weights}")
+    
+    # EXCLUSIVE FILTERING: Only vertices with full weight for target bone (tiny floating point errors allowed)
+    full_weight = target_weights >= 0.99
+    exclusive = full_weight & ~has_other
+    mixed = full_weight & has_other
+    
+    if _DEBUG:
+        for vertex_idx in np.flatnonzero(mixed[:10]).tolist():  # Debug first few mixed vertices
+            entries = valid & ~is_target & (vertex_ids == vertex_idx) & (weights > 0.01)
+            print(f"MESH DEBUG: Vertex {vertex_idx} MIXED WEIGHTS - target: {target_weights[vertex_idx]:.3f}, "
+                  f"others: {weights[entries].tolist()}")
+    
+    return exclusive, mixed, target_weights
+
+def _world_vertex_positions(mesh_obj):
+    """Every vertex position of a mesh in world space as an (N, 3) array (one foreach_get, one matrix apply)"""
+    vertices = mesh_obj.data.vertices
+    co_array = np.empty(len(vertices) * 3, dtype=np.single)
+    vertices.foreach_get('co', co_array)
+    world_matrix = np.array(mesh_obj.matrix_world, dtype=np.float64)
+    return co_array.reshape(-1, 3) @ world_matrix[:3, :3].T + world_matrix[:3, 3]
+
 def analyze_bone_xyz_scaling_from_mesh(original_meshes, modified_meshes, bone_name, bone_head_pos, bone_tail_pos):
     """
     Reverse-engineer XYZ scaling by analyzing vertex displacement patterns.
@@ -75,16 +141,11 @@ def analyze_bone_xyz_scaling_from_mesh(original_meshes, modified_meshes, bone_na
         
         # Find matching meshes (flexible name matching for Blender's duplicate naming)
         mesh_pairs = []
+        # Remove common Blender suffixes (.001, .002, .003, etc.) - once per mesh, not once per pair
+        modified_with_bases = [(mod_mesh, _BLENDER_SUFFIX_RE.sub('', mod_mesh.name)) for mod_mesh in modified_meshes]
         for orig_mesh in original_meshes:
-            for mod_mesh in modified_meshes:
-                orig_base = orig_mesh.name
-                mod_base = mod_mesh.name
-                
-                # Remove common Blender suffixes (.001, .002, .003, etc.)
-                import re
-                orig_base = re.sub(r'\.\d{3}$', '', orig_base)
-                mod_base = re.sub(r'\.\d{3}$', '', mod_base)
-                
+            orig_base = _BLENDER_SUFFIX_RE.sub('', orig_mesh.name)
+            for mod_mesh, mod_base in modified_with_bases:
                 # Check for exact match, base name match, or similar names
                 if (orig_mesh.name == mod_mesh.name or  # Exact match
                     orig_base == mod_base or  # Base name match (e.g., "Body all" matches "Body all")
@@ -116,92 +177,62 @@ def analyze_bone_xyz_scaling_from_mesh(original_meshes, modified_meshes, bone_na
             print(f"MESH ANALYSIS: Found vertex group '{target_vertex_group.name}' in mesh '{mod_mesh.name}'")
             
             # IMPROVED: Find vertices with EXCLUSIVE bone influence (weight=1.0 for target, 0.0 for others)
-            exclusive_vertices = []
+            exclusive_mask, mixed_mask, target_weights = _exclusive_weight_masks(mod_mesh, target_vertex_group.index)
+            mixed_weight_vertices_skipped += int(np.count_nonzero(mixed_mask))
             
-            for vertex_idx, vertex in enumerate(mod_mesh.data.vertices):
-                # Check all vertex groups this vertex belongs to
-                vertex_weights = {}
-                for group in vertex.groups:
-                    if group.group < len(mod_mesh.vertex_groups):
-                        group_name = mod_mesh.vertex_groups[group.group].name
-                        vertex_weights[group_name] = group.weight
-                
-                # Check if this vertex has exclusive influence from our target bone
-                target_weight = vertex_weights.get(target_vertex_group.name, 0.0)
-                
-                # Debug output for first few vertices
-                if vertex_idx < 5:
-                    print(f"MESH DEBUG: Vertex {vertex_idx} weights: {vertex_weights}")
-                
-                # EXCLUSIVE FILTERING: Only vertices with full weight for target bone and no other influences
-                if target_weight >= 0.99:  # Allow tiny floating point errors
-                    # Check if vertex has no significant weight in other bones
-                    other_weights = [w for name, w in vertex_weights.items() if name != target_vertex_group.name and w > 0.01]
-                    
-                    if not other_weights:  # No other bone influences
-                        # SPATIAL FILTERING: Only vertices in middle 50% of bone (25%-75% along bone axis)
-                        vertex_pos = mod_mesh.matrix_world @ vertex.co
-                        
-                        # Project vertex onto bone axis to find position along bone
-                        bone_to_vertex = vertex_pos - bone_head_pos
-                        if bone_length > 0:
-                            projection_ratio = bone_to_vertex.dot(bone_vector) / (bone_length * bone_length)
-                            
-                            # Only use vertices in middle section of bone (avoids joint areas)
-                            if 0.25 <= projection_ratio <= 0.75:
-                                exclusive_vertices.append(vertex_idx)
-                                exclusive_vertices_found += 1
-                                print(f"MESH ANALYSIS: EXCLUSIVE vertex {vertex_idx} - weight: {target_weight:.3f}, position: {projection_ratio:.2f} along bone")
-                            else:
-                                print(f"MESH DEBUG: Vertex {vertex_idx} outside middle section: {projection_ratio:.2f}")
+            mod_positions = _world_vertex_positions(mod_mesh)
+            exclusive_indices = np.flatnonzero(exclusive_mask)
+            
+            # SPATIAL FILTERING: Only vertices in middle 50% of bone (25%-75% along bone axis)
+            if bone_length > 0:
+                # Project vertices onto bone axis to find position along bone
+                projection_ratios = (mod_positions[exclusive_indices] - np.array(bone_head_pos)) @ np.array(bone_vector) \
+                    / (bone_length * bone_length)
+                # Only use vertices in middle section of bone (avoids joint areas)
+                in_middle = (projection_ratios >= 0.25) & (projection_ratios <= 0.75)
+                if _DEBUG:
+                    for vertex_idx, projection_ratio, kept in zip(exclusive_indices.tolist(), projection_ratios.tolist(), in_middle.tolist()):
+                        if kept:
+                            print(f"MESH ANALYSIS: EXCLUSIVE vertex {vertex_idx} - weight: {target_weights[vertex_idx]:.3f}, position: {projection_ratio:.2f} along bone")
                         else:
-                            # Zero-length bone, just use the vertex
-                            exclusive_vertices.append(vertex_idx)
-                            exclusive_vertices_found += 1
-                    else:
-                        mixed_weight_vertices_skipped += 1
-                        if vertex_idx < 10:  # Debug first few mixed vertices
-                            print(f"MESH DEBUG: Vertex {vertex_idx} MIXED WEIGHTS - target: {target_weight:.3f}, others: {other_weights}")
+                            print(f"MESH DEBUG: Vertex {vertex_idx} outside middle section: {projection_ratio:.2f}")
+                exclusive_indices = exclusive_indices[in_middle]
+            # (zero-length bone: just use every exclusive vertex)
+            exclusive_vertices_found += len(exclusive_indices)
             
-            print(f"MESH ANALYSIS: Found {len(exclusive_vertices)} exclusive vertices for '{bone_name}'")
+            print(f"MESH ANALYSIS: Found {len(exclusive_indices)} exclusive vertices for '{bone_name}'")
             print(f"MESH ANALYSIS: Exclusive vertices found: {exclusive_vertices_found}")
             print(f"MESH ANALYSIS: Mixed weight vertices skipped: {mixed_weight_vertices_skipped}")
             
-            if not exclusive_vertices:
+            if not len(exclusive_indices):
                 print(f"MESH ANALYSIS: No exclusive vertices found for bone '{bone_name}' - all vertices have mixed bone influences")
                 continue
             
             # Prioritize vertices but use more if available (up to 50 for better accuracy)
-            sample_vertices = exclusive_vertices[:50] if len(exclusive_vertices) > 50 else exclusive_vertices
-            print(f"MESH ANALYSIS: Analyzing {len(sample_vertices)} exclusive vertex samples")
+            sample_indices = exclusive_indices[:50]
+            print(f"MESH ANALYSIS: Analyzing {len(sample_indices)} exclusive vertex samples")
             
-            for vert_idx in sample_vertices:
-                if vert_idx >= len(orig_mesh.data.vertices):
-                    continue  # Skip if vertex doesn't exist in original
-                    
-                # Get vertex positions in world space
-                orig_pos = orig_mesh.matrix_world @ orig_mesh.data.vertices[vert_idx].co
-                mod_pos = mod_mesh.matrix_world @ mod_mesh.data.vertices[vert_idx].co
-                
-                # Calculate distances from bone center (using absolute distance for scaling analysis)
-                orig_x_dist = abs(orig_pos.x - bone_center.x)
-                orig_z_dist = abs(orig_pos.z - bone_center.z)
-                
-                mod_x_dist = abs(mod_pos.x - bone_center.x)
-                mod_z_dist = abs(mod_pos.z - bone_center.z)
-                
-                # Only analyze vertices that are far enough from bone center (avoid division by zero)
-                if orig_x_dist > 0.005:  # 0.5cm minimum distance (more sensitive)
-                    x_scale_ratio = mod_x_dist / orig_x_dist
-                    x_scale_samples.append(x_scale_ratio)
-                    print(f"MESH ANALYSIS: EXCLUSIVE Vertex {vert_idx} X-scale: {x_scale_ratio:.3f} (dist: {orig_x_dist:.3f} -> {mod_x_dist:.3f})")
-                
-                if orig_z_dist > 0.005:  # 0.5cm minimum distance (more sensitive)
-                    z_scale_ratio = mod_z_dist / orig_z_dist
-                    z_scale_samples.append(z_scale_ratio)
-                    print(f"MESH ANALYSIS: EXCLUSIVE Vertex {vert_idx} Z-scale: {z_scale_ratio:.3f} (dist: {orig_z_dist:.3f} -> {mod_z_dist:.3f})")
-                
-                vertices_analyzed += 1
+            # Skip vertices that don't exist in the original
+            orig_positions = _world_vertex_positions(orig_mesh)
+            sample_indices = sample_indices[sample_indices < len(orig_positions)]
+            vertices_analyzed += len(sample_indices)
+            
+            # Calculate X/Z distances from bone center for all samples at once
+            # (using absolute distance for scaling analysis)
+            center_xz = np.array((bone_center.x, bone_center.z))
+            orig_dists = np.abs(orig_positions[sample_indices][:, [0, 2]] - center_xz)
+            mod_dists = np.abs(mod_positions[sample_indices][:, [0, 2]] - center_xz)
+            
+            # Only analyze vertices that are far enough from bone center (avoid division by zero)
+            # 0.5cm minimum distance (more sensitive)
+            for axis, axis_name, samples in ((0, 'X', x_scale_samples), (1, 'Z', z_scale_samples)):
+                far_enough = orig_dists[:, axis] > 0.005
+                scale_ratios = mod_dists[far_enough, axis] / orig_dists[far_enough, axis]
+                samples.extend(scale_ratios.tolist())
+                if _DEBUG:
+                    for vert_idx, scale_ratio, orig_dist, mod_dist in zip(sample_indices[far_enough].tolist(), scale_ratios.tolist(),
+                                                                         orig_dists[far_enough, axis].tolist(), mod_dists[far_enough, axis].tolist()):
+                        print(f"MESH ANALYSIS: EXCLUSIVE Vertex {vert_idx} {axis_name}-scale: {scale_ratio:.3f} (dist: {orig_dist:.3f} -> {mod_dist:.3f})")
         
         # Calculate final scaling from samples with improved validation
         if not x_scale_samples and not z_scale_samples:
@@ -289,7 +320,8 @@ def should_apply_precision_correction_export(bone_name, bone_data, all_transform
             is_hand_wrist = any(keyword in parent_name_lower for keyword in ['hand', 'wrist'])
             
             if parent_inherit_scale == 'FULL' and is_hand_wrist:
-                print(f"DEBUG EXPORT: '{bone_name}' needs precision data (parent '{parent_bone_name}' is hand/wrist with FULL inheritance)")
+                if _DEBUG:
+                    print(f"DEBUG EXPORT: '{bone_name}' needs precision data (parent '{parent_bone_name}' is hand/wrist with FULL inheritance)")
                 return True
         
         return False
@@ -330,7 +362,7 @@ def find_parent_bone_in_transforms(bone_name, all_transforms):
 import numpy as np
 
 # Import the updated transforms_different function (includes bone length detection)
-from .armature_diff import transforms_different
+from .armature_diff import transforms_different, head_tail_from_matrix, point_along_bone
 
 def convert_head_tail_to_pose_transforms(original_transforms, modified_transforms):
     """
@@ -377,7 +409,8 @@ def convert_head_tail_to_pose_transforms(original_transforms, modified_transform
                     'inherit_scale': modified_transform['inherit_scale']
                 }
                 
-                print(f"DEBUG: Pure length change detected for '{bone_name}': {original_length:.6f} -> {modified_length:.6f} (Y-scale: {length_ratio:.6f})")
+                if _DEBUG:
+                    print(f"DEBUG: Pure length change detected for '{bone_name}': {original_length:.6f} -> {modified_length:.6f} (Y-scale: {length_ratio:.6f})")
                 
             else:
                 # MATRIX CHANGE - use existing conversion logic
@@ -430,9 +463,11 @@ def convert_head_tail_to_pose_transforms(original_transforms, modified_transform
                                         pose_transform['location'][2] * scale_compensation[2]
                                     ]
                                     
-                                    print(f"DEBUG EXPORT: Position compensation for '{bone_name}' - original: {pose_transform['location']}, compensated: {compensated_location}")
+                                    if _DEBUG:
+                                        print(f"DEBUG EXPORT: Position compensation for '{bone_name}' - original: {pose_transform['location']}, compensated: {compensated_location}")
                                 
-                                print(f"DEBUG EXPORT: Inheritance compensation for '{bone_name}' - scale: {pose_transform['scale']} → {compensated_scale}")
+                                if _DEBUG:
+                                    print(f"DEBUG EXPORT: Inheritance compensation for '{bone_name}' - scale: {pose_transform['scale']} → {compensated_scale}")
                                 
                                 # Update the pose_transform with compensated values
                                 pose_transform['location'] = compensated_location
@@ -444,7 +479,8 @@ def convert_head_tail_to_pose_transforms(original_transforms, modified_transform
                     'inherit_scale': modified_transform['inherit_scale']
                 }
                 
-                print(f"DEBUG: Matrix change detected for '{bone_name}' - using matrix conversion")
+                if _DEBUG:
+                    print(f"DEBUG: Matrix change detected for '{bone_name}' - using matrix conversion")
     
     return pose_transforms
 
@@ -470,7 +506,8 @@ def convert_head_tail_to_pose_transforms_filtered(original_transforms, modified_
         
         # Check if transforms are different using smart filtering  
         if transforms_different(baseline_transform, target_transform):
-            print(f"DEBUG EXPORT: Processing bone '{bone_name}' with actual differences")
+            if _DEBUG:
+                print(f"DEBUG EXPORT: Processing bone '{bone_name}' with actual differences")
             
             # Check if this is a pure bone length change vs matrix change
             baseline_length = baseline_transform.get('bone_length', 0.0)
@@ -491,7 +528,8 @@ def convert_head_tail_to_pose_transforms_filtered(original_transforms, modified_
                 if matrix_different:
                     break
             
-            print(f"DEBUG EXPORT: '{bone_name}' - Matrix diff: {max_matrix_diff:.6f}, Length diff: {abs(baseline_length - target_length):.6f}")
+            if _DEBUG:
+                print(f"DEBUG EXPORT: '{bone_name}' - Matrix diff: {max_matrix_diff:.6f}, Length diff: {abs(baseline_length - target_length):.6f}")
             
             # IMPROVED LOGIC: Only treat as "pure length change" if matrix changes are truly minimal
             # If there are significant matrix changes (like XYZ scaling), always use matrix change path
@@ -506,8 +544,7 @@ def convert_head_tail_to_pose_transforms_filtered(original_transforms, modified_
                 if original_meshes and modified_meshes:
                     target_abs_matrix = target_transform['absolute_matrix']
                     bone_head_pos = target_abs_matrix.translation
-                    bone_tail_pos = target_abs_matrix @ Vector((0, target_length, 0, 1))
-                    bone_tail_pos = bone_tail_pos.xyz
+                    bone_tail_pos = point_along_bone(target_abs_matrix, target_length)
                     
                     # Check if XZ scaling analysis is enabled
                     if enable_xz_scaling and original_meshes and modified_meshes:
@@ -526,21 +563,22 @@ def convert_head_tail_to_pose_transforms_filtered(original_transforms, modified_
                         print(f"MESH ANALYSIS SUCCESS (Pure Length): '{bone_name}' - X: {mesh_x_scale:.3f}, Y: {length_ratio:.3f}, Z: {mesh_z_scale:.3f}")
                         # Use mesh analysis results for X and Z, keep calculated Y from bone length
                         final_scale = [mesh_x_scale, length_ratio, mesh_z_scale]
-                        print(f"DEBUG: Applied mesh-based XZ scaling to pure length change '{bone_name}': {final_scale}")
+                        if _DEBUG:
+                            print(f"DEBUG: Applied mesh-based XZ scaling to pure length change '{bone_name}': {final_scale}")
                     else:
                         print(f"MESH ANALYSIS FAILED (Pure Length): '{bone_name}' - using Y-only scaling")
                         if should_skip_xz_scaling_analysis(bone_name):
                             print(f"SCALING FIX: Applied Y-only scaling fix for '{bone_name}' (coordinate space issue)")
                 else:
-                    print(f"DEBUG: No meshes provided for pure length change '{bone_name}' - using Y-only scaling")
+                    if _DEBUG:
+                        print(f"DEBUG: No meshes provided for pure length change '{bone_name}' - using Y-only scaling")
                 
                 # PRECISION DATA: Only calculate target positions for finger bones
                 target_abs_matrix = target_transform['absolute_matrix']
                 
                 # Get pure global coordinates where this bone should end up
                 target_head = target_abs_matrix.translation
-                target_tail = target_abs_matrix @ Vector((0, target_length, 0, 1))
-                target_tail = target_tail.xyz
+                target_tail = point_along_bone(target_abs_matrix, target_length)
                 
                 # Use inheritance chain logic to determine if precision data is needed
                 # Only bones that need precision correction should get precision_data
@@ -559,15 +597,18 @@ def convert_head_tail_to_pose_transforms_filtered(original_transforms, modified_
                         'target_head_position': [target_head.x, target_head.y, target_head.z],
                         'target_tail_position': [target_tail.x, target_tail.y, target_tail.z]
                     }
-                    print(f"DEBUG PRECISION: Added precision data for finger bone '{bone_name}': head [{target_head.x:.6f}, {target_head.y:.6f}, {target_head.z:.6f}]")
+                    if _DEBUG:
+                        print(f"DEBUG PRECISION: Added precision data for finger bone '{bone_name}': head [{target_head.x:.6f}, {target_head.y:.6f}, {target_head.z:.6f}]")
                 
-                print(f"DEBUG: Pure length change detected for '{bone_name}': {baseline_length:.6f} -> {target_length:.6f} (Y-scale: {length_ratio:.6f})")
-                print(f"DEBUG: Matrix changes minimal ({max_matrix_diff:.6f} < 0.005) - using Y-only scaling")
-                print(f"DEBUG PRECISION: Target head position: [{target_head.x:.6f}, {target_head.y:.6f}, {target_head.z:.6f}]")
+                if _DEBUG:
+                    print(f"DEBUG: Pure length change detected for '{bone_name}': {baseline_length:.6f} -> {target_length:.6f} (Y-scale: {length_ratio:.6f})")
+                    print(f"DEBUG: Matrix changes minimal ({max_matrix_diff:.6f} < 0.005) - using Y-only scaling")
+                    print(f"DEBUG PRECISION: Target head position: [{target_head.x:.6f}, {target_head.y:.6f}, {target_head.z:.6f}]")
                 
             else:
                 # MATRIX CHANGE - use existing conversion logic but preserve length scaling
-                print(f"DEBUG: Matrix change detected for '{bone_name}' (matrix diff: {max_matrix_diff:.6f}) - using full matrix conversion")
+                if _DEBUG:
+                    print(f"DEBUG: Matrix change detected for '{bone_name}' (matrix diff: {max_matrix_diff:.6f}) - using full matrix conversion")
                 pose_transform = matrix_to_pose_transform(
                     baseline_transform, 
                     target_transform,
@@ -578,8 +619,7 @@ def convert_head_tail_to_pose_transforms_filtered(original_transforms, modified_
                 mesh_x_scale, mesh_z_scale, mesh_analysis_success = 1.0, 1.0, False
                 if enable_xz_scaling and original_meshes and modified_meshes:
                     bone_head_pos = target_transform['absolute_matrix'].translation
-                    bone_tail_pos = target_transform['absolute_matrix'] @ Vector((0, target_length, 0, 1))
-                    bone_tail_pos = bone_tail_pos.xyz
+                    bone_tail_pos = point_along_bone(target_transform['absolute_matrix'], target_length)
                     
                     mesh_x_scale, mesh_z_scale, mesh_analysis_success = analyze_bone_xyz_scaling_from_mesh(
                         original_meshes, modified_meshes, bone_name, bone_head_pos, bone_tail_pos
@@ -590,7 +630,8 @@ def convert_head_tail_to_pose_transforms_filtered(original_transforms, modified_
                         # Override the matrix-based X and Z scaling with mesh analysis results
                         mesh_corrected_scale = [mesh_x_scale, pose_transform['scale'][1], mesh_z_scale]
                         pose_transform['scale'] = mesh_corrected_scale
-                        print(f"DEBUG: Applied mesh-based XZ scaling to '{bone_name}': {mesh_corrected_scale}")
+                        if _DEBUG:
+                            print(f"DEBUG: Applied mesh-based XZ scaling to '{bone_name}': {mesh_corrected_scale}")
                     else:
                         print(f"MESH ANALYSIS FAILED: '{bone_name}' - falling back to matrix-based scaling")
                         if should_skip_xz_scaling_analysis(bone_name):
@@ -598,15 +639,18 @@ def convert_head_tail_to_pose_transforms_filtered(original_transforms, modified_
                             # Force X/Z to 1.0 for problematic bones even in matrix mode
                             matrix_corrected_scale = [1.0, pose_transform['scale'][1], 1.0]
                             pose_transform['scale'] = matrix_corrected_scale
-                            print(f"DEBUG: Forced Y-only scaling for '{bone_name}': {matrix_corrected_scale}")
+                            if _DEBUG:
+                                print(f"DEBUG: Forced Y-only scaling for '{bone_name}': {matrix_corrected_scale}")
                 elif not enable_xz_scaling:
                     print(f"SCALING MODE: XZ scaling disabled - using Y-only scaling for '{bone_name}'")
                     # Force X/Z to 1.0 when XZ scaling is disabled
                     y_only_scale = [1.0, pose_transform['scale'][1], 1.0]
                     pose_transform['scale'] = y_only_scale
-                    print(f"DEBUG: Applied Y-only scaling for '{bone_name}': {y_only_scale}")
+                    if _DEBUG:
+                        print(f"DEBUG: Applied Y-only scaling for '{bone_name}': {y_only_scale}")
                 else:
-                    print(f"DEBUG: No meshes provided for '{bone_name}' - using matrix-based scaling only")
+                    if _DEBUG:
+                        print(f"DEBUG: No meshes provided for '{bone_name}' - using matrix-based scaling only")
                 
                 # SMART SCALING FIX: Check for uniform vs non-uniform scaling before overriding Y-scale
                 length_difference = abs(baseline_length - target_length)
@@ -623,11 +667,13 @@ def convert_head_tail_to_pose_transforms_filtered(original_transforms, modified_
                     )
                     
                     if is_uniform_scaling:
-                        print(f"DEBUG: Detected uniform XYZ scaling for '{bone_name}': {original_scale} - preserving full XYZ scaling")
+                        if _DEBUG:
+                            print(f"DEBUG: Detected uniform XYZ scaling for '{bone_name}': {original_scale} - preserving full XYZ scaling")
                         # Keep the original matrix scaling - don't override with bone length
                         corrected_scale = original_scale
                     else:
-                        print(f"DEBUG: Overriding Y-scale for '{bone_name}' due to bone length change: {baseline_length:.6f} -> {target_length:.6f} (ratio: {length_ratio:.6f})")
+                        if _DEBUG:
+                            print(f"DEBUG: Overriding Y-scale for '{bone_name}' due to bone length change: {baseline_length:.6f} -> {target_length:.6f} (ratio: {length_ratio:.6f})")
                         # Override the Y-scale component while preserving X and Z scaling
                         corrected_scale = [pose_transform['scale'][0], length_ratio, pose_transform['scale'][2]]
                     
@@ -636,7 +682,8 @@ def convert_head_tail_to_pose_transforms_filtered(original_transforms, modified_
                 # USE MODIFIED INHERIT_SCALE: Export the inherit_scale from the modified armature
                 # This is correct - if user set finger bones to NONE, that's intentional
                 inherit_scale_to_use = target_transform['inherit_scale']
-                print(f"DEBUG: Using modified inherit_scale for '{bone_name}': {inherit_scale_to_use}")
+                if _DEBUG:
+                    print(f"DEBUG: Using modified inherit_scale for '{bone_name}': {inherit_scale_to_use}")
                 
                 # INHERITANCE COMPENSATION: Fix scale values for broken inheritance chains
                 compensated_scale = pose_transform['scale']
@@ -680,9 +727,11 @@ def convert_head_tail_to_pose_transforms_filtered(original_transforms, modified_
                                         pose_transform['location'][2] * scale_compensation[2]
                                     ]
                                     
-                                    print(f"DEBUG EXPORT FILTERED: Position compensation for '{bone_name}' - original: {pose_transform['location']}, compensated: {compensated_location}")
+                                    if _DEBUG:
+                                        print(f"DEBUG EXPORT FILTERED: Position compensation for '{bone_name}' - original: {pose_transform['location']}, compensated: {compensated_location}")
                                 
-                                print(f"DEBUG EXPORT FILTERED: Inheritance compensation for '{bone_name}' - scale: {pose_transform['scale']} → {compensated_scale}")
+                                if _DEBUG:
+                                    print(f"DEBUG EXPORT FILTERED: Inheritance compensation for '{bone_name}' - scale: {pose_transform['scale']} → {compensated_scale}")
                                 
                                 # Update the pose_transform with compensated values
                                 pose_transform['location'] = compensated_location
@@ -692,8 +741,7 @@ def convert_head_tail_to_pose_transforms_filtered(original_transforms, modified_
                 
                 # Get pure global coordinates where this bone should end up
                 target_head_matrix = target_abs_matrix.translation
-                target_tail_matrix = target_abs_matrix @ Vector((0, target_length, 0, 1))
-                target_tail_matrix = target_tail_matrix.xyz
+                target_tail_matrix = point_along_bone(target_abs_matrix, target_length)
                 
                 # Use inheritance chain logic to determine if precision data is needed
                 needs_precision_correction = should_apply_precision_correction_export(bone_name, target_transform, target_transforms)
@@ -711,9 +759,11 @@ def convert_head_tail_to_pose_transforms_filtered(original_transforms, modified_
                         'target_head_position': [target_head_matrix.x, target_head_matrix.y, target_head_matrix.z],
                         'target_tail_position': [target_tail_matrix.x, target_tail_matrix.y, target_tail_matrix.z]
                     }
-                    print(f"DEBUG PRECISION: Added precision data for finger bone '{bone_name}': head [{target_head_matrix.x:.6f}, {target_head_matrix.y:.6f}, {target_head_matrix.z:.6f}]")
+                    if _DEBUG:
+                        print(f"DEBUG PRECISION: Added precision data for finger bone '{bone_name}': head [{target_head_matrix.x:.6f}, {target_head_matrix.y:.6f}, {target_head_matrix.z:.6f}]")
                 
-                print(f"DEBUG: Matrix change detected for '{bone_name}' - using matrix conversion with smart inherit_scale")
+                if _DEBUG:
+                    print(f"DEBUG: Matrix change detected for '{bone_name}' - using matrix conversion with smart inherit_scale")
     
     # INTELLIGENT CHILD FILTERING: Remove position offsets that are purely inherited from parent scaling
     pose_transforms = remove_inherited_child_positions(pose_transforms, baseline_transforms, target_transforms)
@@ -721,7 +771,8 @@ def convert_head_tail_to_pose_transforms_filtered(original_transforms, modified_
     # TARGETED FIX: Additional filtering for parent Y-scaling cases that slip through
     pose_transforms = filter_parent_scaling_offsets(pose_transforms, baseline_transforms, target_transforms)
     
-    print(f"DEBUG: OLD LOGIC with smart inherit_scale + intelligent child filtering + targeted parent scaling fix - exported {len(pose_transforms)} bones")
+    if _DEBUG:
+        print(f"DEBUG: OLD LOGIC with smart inherit_scale + intelligent child filtering + targeted parent scaling fix - exported {len(pose_transforms)} bones")
     return pose_transforms
 
 def remove_inherited_child_positions(pose_transforms, baseline_transforms, target_transforms):
@@ -735,7 +786,8 @@ def remove_inherited_child_positions(pose_transforms, baseline_transforms, targe
     This function identifies and removes these inherited position offsets while preserving
     any independent child bone transformations (like their own scaling).
     """
-    print(f"DEBUG: Applying intelligent child position filtering...")
+    if _DEBUG:
+        print(f"DEBUG: Applying intelligent child position filtering...")
     
     # Build parent-child relationships map
     parent_child_map = {}
@@ -822,7 +874,8 @@ def remove_inherited_child_positions(pose_transforms, baseline_transforms, targe
                         
                     print(f"       Scaling ancestor '{scaling_ancestor}' scale: {pose_transforms[scaling_ancestor]['scale'][1]:.4f}, Child location was: {child_location}")
     
-    print(f"DEBUG: Filtered {bones_filtered} child bones with inherited position offsets")
+    if _DEBUG:
+        print(f"DEBUG: Filtered {bones_filtered} child bones with inherited position offsets")
     return pose_transforms
 
 def filter_parent_scaling_offsets(pose_transforms, baseline_transforms, target_transforms):
@@ -838,7 +891,8 @@ def filter_parent_scaling_offsets(pose_transforms, baseline_transforms, target_t
     When a parent bone is scaled on any axis, children automatically move in pose mode.
     These inherited location offsets should NOT be stored as additional transforms.
     """
-    print(f"DEBUG: Applying targeted parent scaling offset filtering (all axes)...")
+    if _DEBUG:
+        print(f"DEBUG: Applying targeted parent scaling offset filtering (all axes)...")
     
     bones_filtered = 0
     
@@ -878,7 +932,8 @@ def filter_parent_scaling_offsets(pose_transforms, baseline_transforms, target_t
                 elif child_inherit_scale == 'NONE':
                     print(f"       KEEPING: Child '{bone_name}' has inherit_scale='NONE', independent positioning")
     
-    print(f"DEBUG: Targeted filtering removed {bones_filtered} inherited position offsets from parent scaling (all axes)")
+    if _DEBUG:
+        print(f"DEBUG: Targeted filtering removed {bones_filtered} inherited position offsets from parent scaling (all axes)")
     return pose_transforms
 
 # OLD CASCADING FUNCTIONS REMOVED - These were causing incorrect child bone positioning
@@ -890,57 +945,39 @@ def calculate_head_tail_differences(original_transforms, modified_transforms):
     Returns dict with bone differences using head_tail_direct method
     """
     diff_data = {}
-    bones_with_differences = 0
+    
+    # Bones that exist in both armatures, with both transforms resolved up front
+    common_bones = [(bone_name, original_transforms[bone_name], modified_transform)
+                    for bone_name, modified_transform in modified_transforms.items()
+                    if bone_name in original_transforms]
     
     # Compare edit bone matrices for each bone that exists in both armatures
-    for bone_name in modified_transforms:
-        if bone_name not in original_transforms:
-            continue  # Skip bones that don't exist in original
-        
-        original_transform = original_transforms[bone_name]
-        modified_transform = modified_transforms[bone_name]
-        
+    for bone_name, original_transform, modified_transform in common_bones:
         # Check if edit bone matrices are structurally different
         transform_changed = transforms_different(original_transform, modified_transform)
         
         if transform_changed:
             # DIRECT HEAD/TAIL APPROACH: Store the actual head/tail position changes
+            # (transform fields read into locals once per bone)
             orig_abs_matrix = original_transform['absolute_matrix']
             mod_abs_matrix = modified_transform['absolute_matrix']
+            inherit_scale = modified_transform['inherit_scale']
             
-            # Extract head and tail positions from absolute matrices
-            orig_head = orig_abs_matrix.translation
-            orig_tail = orig_abs_matrix @ Vector((0, orig_abs_matrix.to_scale().y, 0, 1))
-            orig_tail = orig_tail.xyz  # Convert to 3D vector
+            # Extract head and tail positions from absolute matrices (column reads, no to_scale())
+            orig_head, orig_tail = head_tail_from_matrix(orig_abs_matrix)
+            mod_head, mod_tail = head_tail_from_matrix(mod_abs_matrix)
             
-            mod_head = mod_abs_matrix.translation  
-            mod_tail = mod_abs_matrix @ Vector((0, mod_abs_matrix.to_scale().y, 0, 1))
-            mod_tail = mod_tail.xyz  # Convert to 3D vector
-            
-            # Calculate head and tail differences
-            head_diff = mod_head - orig_head
-            tail_diff = mod_tail - orig_tail
-            
-            # Store as direct head/tail modifications instead of pose transforms
-            diff_data[bone_name] = {
-                'method': 'head_tail_direct',
-                'head_difference': [head_diff.x, head_diff.y, head_diff.z],
-                'tail_difference': [tail_diff.x, tail_diff.y, tail_diff.z],
-                'inherit_scale': modified_transform['inherit_scale'],
-                'original_length': (orig_tail - orig_head).length,
-                'modified_length': (mod_tail - mod_head).length
-            }
-            bones_with_differences += 1
-            
-            parent_name = original_transform.get('parent_name', 'ROOT')
-            print(f"DEBUG: Found HEAD/TAIL difference in bone '{bone_name}' (parent: {parent_name})")
-            print(f"  Head diff: [{head_diff.x:.6f}, {head_diff.y:.6f}, {head_diff.z:.6f}]")
-            print(f"  Tail diff: [{tail_diff.x:.6f}, {tail_diff.y:.6f}, {tail_diff.z:.6f}]")
-            print(f"  Length: {(orig_tail - orig_head).length:.6f} → {(mod_tail - mod_head).length:.6f}")
+            # Calculate head and tail differences - unpacked once into plain floats so the
+            # rest of the loop doesn't go through Vector attribute access
+            hx, hy, hz = mod_head - orig_head
+            tx, ty, tz = mod_tail - orig_tail
             
             # FALLBACK: If head/tail approach fails, use pose transforms
-            if (head_diff.length < 0.0001 and tail_diff.length < 0.0001):
-                print(f"DEBUG: Head/tail differences too small, falling back to pose transforms for '{bone_name}'")
+            # Decided before anything is stored so each bone gets exactly one entry
+            # (squared magnitudes against a squared threshold - no sqrt)
+            if hx * hx + hy * hy + hz * hz < 0.0001 ** 2 and tx * tx + ty * ty + tz * tz < 0.0001 ** 2:
+                if _DEBUG:
+                    print(f"DEBUG: Head/tail differences too small, falling back to pose transforms for '{bone_name}'")
                 # Convert relative matrix difference to pose transform components
                 pose_transform = matrix_to_pose_transform(
                     original_transform, 
@@ -953,10 +990,35 @@ def calculate_head_tail_differences(original_transforms, modified_transforms):
                     'location': pose_transform['location'],
                     'rotation_quaternion': pose_transform['rotation_quaternion'],
                     'scale': pose_transform['scale'],
-                    'inherit_scale': modified_transform['inherit_scale']
+                    'inherit_scale': inherit_scale
                 }
+                continue
+            
+            ox, oy, oz = orig_tail - orig_head
+            mx, my, mz = mod_tail - mod_head
+            original_length = sqrt(ox * ox + oy * oy + oz * oz)
+            modified_length = sqrt(mx * mx + my * my + mz * mz)
+            
+            # Store as direct head/tail modifications instead of pose transforms
+            # (coordinates as tuples - immutable and smaller than lists, json writes them as arrays all the same)
+            diff_data[bone_name] = {
+                'method': 'head_tail_direct',
+                'head_difference': (hx, hy, hz),
+                'tail_difference': (tx, ty, tz),
+                'inherit_scale': inherit_scale,
+                'original_length': original_length,
+                'modified_length': modified_length
+            }
+            
+            if _DEBUG:
+                parent_name = original_transform.get('parent_name', 'ROOT')
+                print(f"DEBUG: Found HEAD/TAIL difference in bone '{bone_name}' (parent: {parent_name})")
+                print(f"  Head diff: [{hx:.6f}, {hy:.6f}, {hz:.6f}]")
+                print(f"  Tail diff: [{tx:.6f}, {ty:.6f}, {tz:.6f}]")
+                print(f"  Length: {original_length:.6f} → {modified_length:.6f}")
     
-    return diff_data, bones_with_differences
+    # Every changed bone gets exactly one entry, so the count is just the dict size
+    return diff_data, len(diff_data)
 
 # Import the updated transforms_different function from armature_diff (includes bone length detection)
 from .armature_diff import transforms_different
@@ -976,15 +1038,18 @@ def matrix_to_pose_transform(original_transform, modified_transform, invert_dire
     if invert_direction:
         # Use original math (compensates for backwards UI input)
         relative_matrix = original_matrix.inverted() @ modified_matrix
-        print("DEBUG: Using ORIGINAL math (compensating for backwards UI input)")
+        if _DEBUG:
+            print("DEBUG: Using ORIGINAL math (compensating for backwards UI input)")
     else:
         # Use swapped math (if UI input was correct)
         relative_matrix = modified_matrix.inverted() @ original_matrix  
-        print("DEBUG: Using SWAPPED math (assuming correct UI input)")
+        if _DEBUG:
+            print("DEBUG: Using SWAPPED math (assuming correct UI input)")
     
     # FIXED: Extract full XYZ scaling from the relative matrix
     # Don't override with length-based scaling - use the actual matrix scaling values
-    print("DEBUG: Using full XYZ matrix scaling (no length override)")
+    if _DEBUG:
+        print("DEBUG: Using full XYZ matrix scaling (no length override)")
     
     # Decompose into location, rotation, scale
     location, rotation, scale = relative_matrix.decompose()
@@ -1013,11 +1078,12 @@ def matrix_to_pose_transform(original_transform, modified_transform, invert_dire
             clean_scale.append(s)
     
     # Debug output to verify transform direction
-    print(f"DEBUG: Calculated pose transform - Location: {clean_loc}, Scale: {clean_scale}")
-    if clean_scale[0] > 1.0 or clean_scale[1] > 1.0 or clean_scale[2] > 1.0:
-        print("DEBUG: ✓ Scale > 1.0 detected - should LENGTHEN bones")
-    elif clean_scale[0] < 1.0 or clean_scale[1] < 1.0 or clean_scale[2] < 1.0:
-        print("DEBUG: ⚠ Scale < 1.0 detected - will SHRINK bones") 
+    if _DEBUG:
+        print(f"DEBUG: Calculated pose transform - Location: {clean_loc}, Scale: {clean_scale}")
+        if clean_scale[0] > 1.0 or clean_scale[1] > 1.0 or clean_scale[2] > 1.0:
+            print("DEBUG: ✓ Scale > 1.0 detected - should LENGTHEN bones")
+        elif clean_scale[0] < 1.0 or clean_scale[1] < 1.0 or clean_scale[2] < 1.0:
+            print("DEBUG: ⚠ Scale < 1.0 detected - will SHRINK bones") 
     
     return {
         'location': clean_loc,
@@ -1031,7 +1097,8 @@ def apply_head_tail_transform_with_mesh_deformation(armature, bone_name, transfo
     This is the FIXED version that properly handles mesh transformation
     """
     try:
-        print(f"DEBUG: FIXED method - Applying head/tail transform with mesh deformation to '{bone_name}'")
+        if _DEBUG:
+            print(f"DEBUG: FIXED method - Applying head/tail transform with mesh deformation to '{bone_name}'")
         
         # Store current state
         original_mode = bpy.context.mode
@@ -1047,7 +1114,8 @@ def apply_head_tail_transform_with_mesh_deformation(armature, bone_name, transfo
             head_diff = Vector(transform_data['head_difference'])
             tail_diff = Vector(transform_data['tail_difference'])
             
-            print(f"DEBUG: Applying head/tail to '{bone_name}': head_diff={head_diff}, tail_diff={tail_diff}")
+            if _DEBUG:
+                print(f"DEBUG: Applying head/tail to '{bone_name}': head_diff={head_diff}, tail_diff={tail_diff}")
             
             # Store original positions for mesh calculation
             original_head = edit_bone.head.copy()
@@ -1057,7 +1125,8 @@ def apply_head_tail_transform_with_mesh_deformation(armature, bone_name, transfo
             edit_bone.head += head_diff
             edit_bone.tail += tail_diff
             
-            print(f"DEBUG: Applied head/tail transform to '{bone_name}' successfully")
+            if _DEBUG:
+                print(f"DEBUG: Applied head/tail transform to '{bone_name}' successfully")
             
             # STEP 2: Switch to pose mode and create equivalent pose transform for mesh deformation
             bpy.ops.object.mode_set(mode='POSE')
@@ -1071,13 +1140,15 @@ def apply_head_tail_transform_with_mesh_deformation(armature, bone_name, transfo
                 
                 if original_length > 0.001:  # Avoid division by zero
                     scale_factor = new_length / original_length
-                    print(f"DEBUG: Calculated scale factor: {scale_factor} for mesh deformation")
+                    if _DEBUG:
+                        print(f"DEBUG: Calculated scale factor: {scale_factor} for mesh deformation")
                     
                     # Apply the scale to the pose bone for mesh deformation
                     # This ensures the mesh deforms properly when "Apply as Rest Pose" is called
                     pose_bone.scale.y = scale_factor  # Y-axis is bone length in Blender
                     
-                    print(f"DEBUG: Applied pose scale {scale_factor} to bone '{bone_name}' for mesh deformation")
+                    if _DEBUG:
+                        print(f"DEBUG: Applied pose scale {scale_factor} to bone '{bone_name}' for mesh deformation")
             
             return True
         else:
@@ -1101,7 +1172,7 @@ def get_armature_transforms(armature):
     try:
         # Store current state
         original_active = bpy.context.view_layer.objects.active
-        original_selected = bpy.context.selected_objects[:]
+        original_selected_names = [obj.name for obj in bpy.context.selected_objects]
         original_mode = bpy.context.mode
         
         # Switch to object mode and select armature
@@ -1135,12 +1206,13 @@ def get_armature_transforms(armature):
                     unscaled_parent_matrix = Matrix.LocRotScale(parent_loc, parent_rot, (1.0, 1.0, 1.0))
                     relative_matrix = unscaled_parent_matrix.inverted() @ absolute_matrix
                     
-                    print(f"DEBUG: Child '{edit_bone.name}' has inherit_scale='NONE' - using unscaled parent matrix")
+                    if _DEBUG:
+                        print(f"DEBUG: Child '{edit_bone.name}' has inherit_scale='NONE' - using unscaled parent matrix")
                 else:
                     # Child has inherit_scale='FULL' or other - use full parent matrix
                     relative_matrix = parent_matrix.inverted() @ absolute_matrix
                     
-                    if edit_bone.inherit_scale == 'FULL':
+                    if _DEBUG and edit_bone.inherit_scale == 'FULL':
                         print(f"DEBUG: Child '{edit_bone.name}' has inherit_scale='FULL' - using full parent matrix from '{edit_bone.parent.name}'")
             else:
                 # Root bone - use absolute matrix
@@ -1169,8 +1241,10 @@ def get_armature_transforms(armature):
                     bpy.ops.object.mode_set(mode='POSE')
             
             bpy.ops.object.select_all(action='DESELECT')
-            for obj in original_selected:
-                obj.select_set(True)
+            for obj_name in original_selected_names:
+                obj = bpy.data.objects.get(obj_name)
+                if obj:
+                    obj.select_set(True)
             bpy.context.view_layer.objects.active = original_active
         except:
             pass
@@ -1181,7 +1255,7 @@ def apply_armature_to_mesh_with_no_shape_keys(armature_obj, mesh_obj):
     
     # Store current active object
     original_active = bpy.context.view_layer.objects.active
-    original_selected = bpy.context.selected_objects[:]
+    original_selected_names = [obj.name for obj in bpy.context.selected_objects]
     
     try:
         # Make mesh active and selected
@@ -1212,8 +1286,10 @@ def apply_armature_to_mesh_with_no_shape_keys(armature_obj, mesh_obj):
     finally:
         # Restore original selection
         bpy.ops.object.select_all(action='DESELECT')
-        for obj in original_selected:
-            obj.select_set(True)
+        for obj_name in original_selected_names:
+            obj = bpy.data.objects.get(obj_name)
+            if obj:
+                obj.select_set(True)
         bpy.context.view_layer.objects.active = original_active
 
 def apply_armature_to_mesh_with_shape_keys(armature_obj, mesh_obj):
@@ -1222,7 +1298,7 @@ def apply_armature_to_mesh_with_shape_keys(armature_obj, mesh_obj):
     
     # Store current active object and selection
     original_active = bpy.context.view_layer.objects.active
-    original_selected = bpy.context.selected_objects[:]
+    original_selected_names = [obj.name for obj in bpy.context.selected_objects]
     
     try:
         # Make mesh active
@@ -1312,6 +1388,8 @@ def apply_armature_to_mesh_with_shape_keys(armature_obj, mesh_obj):
     finally:
         # Restore original selection
         bpy.ops.object.select_all(action='DESELECT')
-        for obj in original_selected:
-            obj.select_set(True)
+        for obj_name in original_selected_names:
+            obj = bpy.data.objects.get(obj_name)
+            if obj:
+                obj.select_set(True)
         bpy.context.view_layer.objects.active = original_active
\ No newline at end of file
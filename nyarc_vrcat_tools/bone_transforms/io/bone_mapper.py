@@ -4,86 +4,121 @@
 
 import re
 from typing import Dict, List, Tuple, Optional, Set
-from ..compatibility.vrchat_bones import VRCHAT_STANDARD_BONES
+from ..compatibility.vrchat_bones import VRCHAT_STANDARD_BONES, STANDARD_BONE_NAMES
 
 # Now using VRCHAT_STANDARD_BONES from compatibility module for comprehensive bone name matching
 
+# Set to True to trace bone matching in the console (runs per bone, so off by default)
+_DEBUG = False
+
+# Substrings marking a bone name as a likely base (body) bone rather than hair/clothing
+_BASE_KEYWORDS = ('leg', 'arm', 'shoulder', 'hip', 'spine', 'chest', 'neck', 'head', 'hand', 'foot', 'toe', 'thigh', 'shin', 'elbow', 'wrist', 'ankle', 'butt', 'glute')
+
 def get_base_bone_names() -> Set[str]:
     """Get all possible base bone names from VRChat standard bones"""
-    base_names = set()
-    for bone_list in VRCHAT_STANDARD_BONES.values():
-        base_names.update(bone_list)
-    return base_names
+    return set(STANDARD_BONE_NAMES)
 
 def normalize_bone_name(bone_name: str) -> str:
     """Normalize bone name for comparison (lowercase, strip spaces)"""
     return bone_name.lower().strip().replace(' ', '_')
 
+def _build_normalized_standard_bones() -> Dict[str, Tuple[str, str]]:
+    """Map normalized standard bone names to (category, standard_name), first category wins"""
+    normalized_index = {}
+    for category, standard_names in VRCHAT_STANDARD_BONES.items():
+        for standard_name in standard_names:
+            normalized_index.setdefault(normalize_bone_name(standard_name), (category, standard_name))
+    return normalized_index
+
+# Exact-match lookup built once at import instead of normalizing every standard name per query
+_NORMALIZED_STANDARD_BONES = _build_normalized_standard_bones()
+
+# Specific terms that make a standard name a better contains-match candidate
+_SPECIFIC_TERMS = ('lower', 'upper', 'elbow', 'knee', 'ankle', 'wrist', 'forearm', 'shin', 'thigh')
+
+def _build_contains_match_entries() -> List[Tuple[str, str, str, bool, bool, int]]:
+    """Precompute (category, standard_name, normalized, category_is_left, category_is_right, specificity)
+    for every standard name long enough to take part in contains matching"""
+    entries = []
+    for category, standard_names in VRCHAT_STANDARD_BONES.items():
+        category_is_left = 'left' in category
+        category_is_right = 'right' in category
+        for standard_name in standard_names:
+            standard_normalized = normalize_bone_name(standard_name)
+            if len(standard_normalized) <= 3:
+                continue
+            # Calculate specificity score (longer matches = more specific)
+            # Also prioritize matches where the standard name contains more specific terms
+            specificity = len(standard_normalized)
+            for term in _SPECIFIC_TERMS:
+                if term in standard_normalized:
+                    specificity += 10  # Big bonus for specific terms
+            entries.append((category, standard_name, standard_normalized, category_is_left, category_is_right, specificity))
+    return entries
+
+# Contains-match candidates in table order, so find_semantic_category does no per-query normalization
+_CONTAINS_MATCH_ENTRIES = _build_contains_match_entries()
+
+def detect_bone_side(normalized_name: str) -> Tuple[bool, bool]:
+    """Detect left/right side markers in a normalized bone name
+    Returns: (is_left, is_right)"""
+    is_left = '_l' in normalized_name or '.l' in normalized_name or 'left' in normalized_name
+    is_right = '_r' in normalized_name or '.r' in normalized_name or 'right' in normalized_name
+    return is_left, is_right
+
 def find_semantic_category(bone_name: str) -> Optional[str]:
     """Find which semantic category a bone belongs to using VRChat standard bones (case-insensitive)"""
     normalized = normalize_bone_name(bone_name)
     # Only debug relevant bones (avoid spam for hair/clothing bones)
-    base_keywords = ['leg', 'arm', 'shoulder', 'hip', 'spine', 'chest', 'neck', 'head', 'hand', 'foot', 'toe', 'thigh', 'shin', 'elbow', 'wrist', 'ankle', 'butt', 'glute']
-    is_likely_base = any(keyword in normalized for keyword in base_keywords)
+    is_likely_base = _DEBUG and any(keyword in normalized for keyword in _BASE_KEYWORDS)
     
     if is_likely_base:
         print(f"DEBUG: Finding category for '{bone_name}' (normalized: '{normalized}')")
     
     # FIRST PASS: Check for exact matches across ALL VRChat standard bone categories (case-insensitive)
-    for category, standard_names in VRCHAT_STANDARD_BONES.items():
-        for standard_name in standard_names:
-            standard_normalized = normalize_bone_name(standard_name)
-            
-            # Exact match - highest priority (case-insensitive)
-            if normalized == standard_normalized:
-                print(f"DEBUG: EXACT match '{bone_name}' -> category '{category}' (via '{standard_name}')")
-                return category
+    exact_match = _NORMALIZED_STANDARD_BONES.get(normalized)
+    if exact_match:
+        category, standard_name = exact_match
+        if _DEBUG:
+            print(f"DEBUG: EXACT match '{bone_name}' -> category '{category}' (via '{standard_name}')")
+        return category
     
     # SECOND PASS: Check for contains matches, but prioritize by specificity
     # Collect all potential matches with their specificity scores
     potential_matches = []
     
-    for category, standard_names in VRCHAT_STANDARD_BONES.items():
-        for standard_name in standard_names:
-            standard_normalized = normalize_bone_name(standard_name)
-            
+    # Side of the queried bone only depends on its name - detect it once, not per standard name
+    bone_is_left, bone_is_right = detect_bone_side(normalized)
+    
+    if len(normalized) > 3:  # Avoid short false matches
+        normalized_length = len(normalized)
+        for category, standard_name, standard_normalized, category_is_left, category_is_right, specificity in _CONTAINS_MATCH_ENTRIES:
             # Contains match (more restrictive now) - case-insensitive
-            if len(normalized) > 3 and len(standard_normalized) > 3:  # Avoid short false matches
-                if (normalized in standard_normalized or standard_normalized in normalized):
-                    # CRITICAL: Ensure left/right consistency
-                    bone_is_left = any(indicator in normalized for indicator in ['_l', '.l', 'left'])
-                    bone_is_right = any(indicator in normalized for indicator in ['_r', '.r', 'right'])
-                    category_is_left = 'left' in category
-                    category_is_right = 'right' in category
-                    
-                    # Only match if left/right sides match
-                    if ((bone_is_left and category_is_left) or 
-                        (bone_is_right and category_is_right) or 
-                        (not bone_is_left and not bone_is_right and not category_is_left and not category_is_right)):
-                        
-                        # Calculate specificity score (longer matches = more specific)
-                        # Also prioritize matches where the standard name contains more specific terms
-                        specificity = len(standard_normalized)
-                        
-                        # Bonus for more specific terms
-                        specific_terms = ['lower', 'upper', 'elbow', 'knee', 'ankle', 'wrist', 'forearm', 'shin', 'thigh']
-                        for term in specific_terms:
-                            if term in standard_normalized:
-                                specificity += 10  # Big bonus for specific terms
-                        
-                        potential_matches.append((category, standard_name, specificity))
+            # Only the shorter name can be inside the longer one, so one test per pair
+            if len(standard_normalized) >= normalized_length:
+                is_contained = normalized in standard_normalized
+            else:
+                is_contained = standard_normalized in normalized
+            if is_contained:
+                # CRITICAL: Ensure left/right consistency
+                # Only match if left/right sides match
+                if ((bone_is_left and category_is_left) or 
+                    (bone_is_right and category_is_right) or 
+                    (not bone_is_left and not bone_is_right and not category_is_left and not category_is_right)):
+                    potential_matches.append((category, standard_name, specificity))
     
     # Return the most specific match
     if potential_matches:
         # Sort by specificity (highest first)
         potential_matches.sort(key=lambda x: x[2], reverse=True)
         best_category, best_standard, best_score = potential_matches[0]
-        print(f"DEBUG: CONTAINS match '{bone_name}' -> category '{best_category}' (via '{best_standard}', specificity={best_score})")
-        
-        # Debug: show other potential matches that were rejected
-        if len(potential_matches) > 1:
-            other_matches = [(cat, std, score) for cat, std, score in potential_matches[1:]]
-            print(f"DEBUG: Rejected less specific matches: {other_matches}")
+        if _DEBUG:
+            print(f"DEBUG: CONTAINS match '{bone_name}' -> category '{best_category}' (via '{best_standard}', specificity={best_score})")
+            
+            # Debug: show other potential matches that were rejected
+            if len(potential_matches) > 1:
+                other_matches = [(cat, std, score) for cat, std, score in potential_matches[1:]]
+                print(f"DEBUG: Rejected less specific matches: {other_matches}")
         
         return best_category
     
@@ -113,14 +148,17 @@ def check_base_bone_coverage(matched_bones: Dict[str, str], armature_bones: List
     Check if all essential base bones were matched exactly
     Returns: (all_base_bones_covered, missing_base_categories)
     """
-    print(f"DEBUG: Checking base bone coverage - {len(matched_bones)} exact matches found")
+    if _DEBUG:
+        print(f"DEBUG: Checking base bone coverage - {len(matched_bones)} exact matches found")
     
     # Quick optimization: if we have very few exact matches, assume we need semantic mapping
     if len(matched_bones) < 10:
-        print(f"DEBUG: Few exact matches ({len(matched_bones)}), assuming semantic mapping needed")
+        if _DEBUG:
+            print(f"DEBUG: Few exact matches ({len(matched_bones)}), assuming semantic mapping needed")
         return False, ["needs_semantic_check"]
     
-    print(f"DEBUG: Many exact matches ({len(matched_bones)}), likely same armature - skipping semantic mapping")
+    if _DEBUG:
+        print(f"DEBUG: Many exact matches ({len(matched_bones)}), likely same armature - skipping semantic mapping")
     return True, []
 
 def apply_semantic_mapping(unmatched_preset_bones: List[str], armature_bones: List[str], missing_categories: List[str]) -> Dict[str, str]:
@@ -129,27 +167,31 @@ def apply_semantic_mapping(unmatched_preset_bones: List[str], armature_bones: Li
     Returns: dict of preset_bone -> armature_bone mappings
     """
     semantic_matches = {}
-    print(f"DEBUG: Starting semantic mapping for {len(unmatched_preset_bones)} unmatched preset bones...")
+    if _DEBUG:
+        print(f"DEBUG: Starting semantic mapping for {len(unmatched_preset_bones)} unmatched preset bones...")
     
     # Pre-filter armature bones to likely base bones only (major performance optimization)
-    base_keywords = ['leg', 'arm', 'shoulder', 'hip', 'spine', 'chest', 'neck', 'head', 'hand', 'foot', 'toe', 'thigh', 'shin', 'elbow', 'wrist', 'ankle', 'butt', 'glute']
     likely_base_bones = [bone for bone in armature_bones 
-                       if any(keyword in bone.lower() for keyword in base_keywords)]
+                       if any(keyword in bone.lower() for keyword in _BASE_KEYWORDS)]
     
-    print(f"DEBUG: Filtered to {len(likely_base_bones)} likely base bones (from {len(armature_bones)} total)")
+    if _DEBUG:
+        print(f"DEBUG: Filtered to {len(likely_base_bones)} likely base bones (from {len(armature_bones)} total)")
     
     # Build a cache of armature bone categories to avoid repeated calls
     armature_bone_categories = {}
     
     for preset_bone in unmatched_preset_bones:
-        print(f"DEBUG: Processing preset bone '{preset_bone}'")
+        if _DEBUG:
+            print(f"DEBUG: Processing preset bone '{preset_bone}'")
         preset_category = find_semantic_category(preset_bone)
         
         if not preset_category:
-            print(f"DEBUG: No category found for preset bone '{preset_bone}' - skipping")
+            if _DEBUG:
+                print(f"DEBUG: No category found for preset bone '{preset_bone}' - skipping")
             continue
             
-        print(f"DEBUG: Preset bone '{preset_bone}' -> category '{preset_category}'")
+        if _DEBUG:
+            print(f"DEBUG: Preset bone '{preset_bone}' -> category '{preset_category}'")
         
         # Look for armature bone in the same category (only check likely base bones)
         found_match = False
@@ -166,14 +208,17 @@ def apply_semantic_mapping(unmatched_preset_bones: List[str], armature_bones: Li
             
             if armature_category == preset_category:
                 semantic_matches[preset_bone] = armature_bone
-                print(f"DEBUG: SEMANTIC MATCH: '{preset_bone}' -> '{armature_bone}' (category: {preset_category})")
+                if _DEBUG:
+                    print(f"DEBUG: SEMANTIC MATCH: '{preset_bone}' -> '{armature_bone}' (category: {preset_category})")
                 found_match = True
                 break
         
         if not found_match:
-            print(f"DEBUG: No armature bone found for category '{preset_category}'")
+            if _DEBUG:
+                print(f"DEBUG: No armature bone found for category '{preset_category}'")
     
-    print(f"DEBUG: Final semantic matches: {len(semantic_matches)} found")
+    if _DEBUG:
+        print(f"DEBUG: Final semantic matches: {len(semantic_matches)} found")
     return semantic_matches
 
 def hybrid_bone_matching(preset_bones: Dict[str, dict], armature_bones: List[str]) -> Tuple[Dict[str, str], Dict[str, str], List[str]]:
@@ -181,34 +226,39 @@ def hybrid_bone_matching(preset_bones: Dict[str, dict], armature_bones: List[str
     Main hybrid matching function: exact first, then semantic for missing base bones
     Returns: (exact_matches, semantic_matches, completely_unmatched)
     """
-    print(f"DEBUG: === HYBRID BONE MATCHING START ===")
-    print(f"DEBUG: Preset bones: {list(preset_bones.keys())}")
-    print(f"DEBUG: Armature bones: {armature_bones}")
+    if _DEBUG:
+        print(f"DEBUG: === HYBRID BONE MATCHING START ===")
+        print(f"DEBUG: Preset bones: {list(preset_bones.keys())}")
+        print(f"DEBUG: Armature bones: {armature_bones}")
     
     # Step 1: Apply exact matching
     exact_matches, unmatched_preset = apply_exact_matching(preset_bones, armature_bones)
-    print(f"DEBUG: Exact matches: {exact_matches}")
-    print(f"DEBUG: Unmatched after exact: {unmatched_preset}")
+    if _DEBUG:
+        print(f"DEBUG: Exact matches: {exact_matches}")
+        print(f"DEBUG: Unmatched after exact: {unmatched_preset}")
     
     # Step 2: Check if all base bones are covered by exact matching
     all_base_covered, missing_categories = check_base_bone_coverage(exact_matches, armature_bones)
-    print(f"DEBUG: All base bones covered: {all_base_covered}")
-    print(f"DEBUG: Missing categories: {missing_categories}")
+    if _DEBUG:
+        print(f"DEBUG: All base bones covered: {all_base_covered}")
+        print(f"DEBUG: Missing categories: {missing_categories}")
     
     # Step 3: Apply semantic mapping only if base bones are missing
     semantic_matches = {}
     if not all_base_covered:
-        print(f"DEBUG: Base bones missing, applying semantic mapping...")
+        if _DEBUG:
+            print(f"DEBUG: Base bones missing, applying semantic mapping...")
         semantic_matches = apply_semantic_mapping(unmatched_preset, armature_bones, missing_categories)
-    else:
+    elif _DEBUG:
         print(f"DEBUG: All base bones covered by exact matching, skipping semantic mapping")
     
     # Step 4: Find completely unmatched bones
     all_matched = set(exact_matches.keys()) | set(semantic_matches.keys())
     completely_unmatched = [bone for bone in unmatched_preset if bone not in all_matched]
     
-    print(f"DEBUG: === HYBRID BONE MATCHING END ===")
-    print(f"DEBUG: Final results - Exact: {len(exact_matches)}, Semantic: {len(semantic_matches)}, Unmatched: {len(completely_unmatched)}")
+    if _DEBUG:
+        print(f"DEBUG: === HYBRID BONE MATCHING END ===")
+        print(f"DEBUG: Final results - Exact: {len(exact_matches)}, Semantic: {len(semantic_matches)}, Unmatched: {len(completely_unmatched)}")
     
     return exact_matches, semantic_matches, completely_unmatched
 
@@ -72,7 +72,7 @@ class ARMATURE_OT_export_armature_diff(Operator):
         try:
             # Store current state to restore later
             original_active = context.view_layer.objects.active
-            original_selected = context.selected_objects[:]
+            original_selected_names = [obj.name for obj in context.selected_objects]
             original_mode = context.mode
             
             # Switch to object mode first
@@ -171,8 +171,10 @@ class ARMATURE_OT_export_armature_diff(Operator):
                 
                 # Restore selection
                 bpy.ops.object.select_all(action='DESELECT')
-                for obj in original_selected:
-                    obj.select_set(True)
+                for obj_name in original_selected_names:
+                    obj = bpy.data.objects.get(obj_name)
+                    if obj:
+                        obj.select_set(True)
                 context.view_layer.objects.active = original_active
             except:
                 pass
\ No newline at end of file
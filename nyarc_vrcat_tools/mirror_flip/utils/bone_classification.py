@@ -1,7 +1,51 @@
 # Bone Classification Utility
 # Uses existing VRChat compatibility mappings to classify bones
 
-from ...bone_transforms.compatibility.vrchat_bones import VRCHAT_STANDARD_BONES
+import re
+from functools import lru_cache
+
+from ...bone_transforms.compatibility.vrchat_bones import (
+    VRCHAT_STANDARD_BONES, STANDARD_BONE_NAMES_LOWER, is_bone_in_category
+)
+
+
+def _normalize_bone_name(bone_lower):
+    """Normalize a lowercase bone name: remove spaces, underscores, dots for better matching"""
+    return bone_lower.replace(' ', '').replace('_', '').replace('.', '')
+
+
+def _build_standard_bone_forms(categories):
+    """Precompute (category, standard_name, lower, normalized) for every VRChat standard bone"""
+    forms = []
+    for category in categories:
+        for standard_name in VRCHAT_STANDARD_BONES[category]:
+            standard_lower = standard_name.lower()
+            forms.append((category, standard_name, standard_lower, _normalize_bone_name(standard_lower)))
+    return tuple(forms)
+
+
+# Lowercase/normalized forms are computed once at import instead of per classified bone
+_STANDARD_BONE_FORMS = _build_standard_bone_forms(VRCHAT_STANDARD_BONES.keys())
+_CORE_BONE_FORMS = _build_standard_bone_forms(['core'])
+
+# Normalized forms of every standard bone for a single-probe normalized match
+_STANDARD_NORMALIZED_NAMES = frozenset(forms[3] for forms in _STANDARD_BONE_FORMS)
+
+
+@lru_cache(maxsize=None)
+def _category_matchers():
+    """Per category: (category, regex of its lowercase names, normalized name set, its forms).
+    Lets opposite-bone lookup skip whole categories in one C-level search each; compiled
+    on first use so the ~90 patterns don't slow down add-on startup."""
+    matchers = []
+    for category in VRCHAT_STANDARD_BONES.keys():
+        forms = tuple(form for form in _STANDARD_BONE_FORMS if form[0] == category)
+        if not forms:
+            continue
+        standard_lowers = sorted({form[2] for form in forms}, key=len, reverse=True)
+        pattern = re.compile('|'.join(map(re.escape, standard_lowers)))
+        matchers.append((category, pattern, frozenset(form[3] for form in forms), forms))
+    return tuple(matchers)
 
 
 def _is_meaningful_substring_match(bone_lower, standard_lower):
@@ -49,29 +93,24 @@ def is_vrchat_base_bone(bone_name):
         return False
     
     bone_lower = bone_name.lower()
+    
+    # Exact match against any standard name is a single set probe
+    if bone_lower in STANDARD_BONE_NAMES_LOWER:
+        print(f"BONE_CLASSIFICATION: '{bone_name}' is VRChat base bone (exact match)")
+        return True
+    
     # Normalize bone name: remove spaces, underscores, dots for better matching
-    bone_normalized = bone_lower.replace(' ', '').replace('_', '').replace('.', '')
+    # Normalized match (e.g., "Right knee" → "rightknee" matches "rightknee") is also a set probe
+    if _normalize_bone_name(bone_lower) in _STANDARD_NORMALIZED_NAMES:
+        print(f"BONE_CLASSIFICATION: '{bone_name}' is VRChat base bone (normalized match)")
+        return True
     
     # Check against all VRChat standard bone categories
-    for category, standard_names in VRCHAT_STANDARD_BONES.items():
-        for standard_name in standard_names:
-            standard_lower = standard_name.lower()
-            standard_normalized = standard_lower.replace(' ', '').replace('_', '').replace('.', '')
-            
-            # Check for exact match
-            if bone_lower == standard_lower:
-                print(f"BONE_CLASSIFICATION: '{bone_name}' is VRChat base bone (exact match: {standard_name})")
-                return True
-            
-            # Check for normalized match (e.g., "Right knee" → "rightknee" matches "rightknee")
-            if bone_normalized == standard_normalized:
-                print(f"BONE_CLASSIFICATION: '{bone_name}' is VRChat base bone (normalized match: {standard_name})")
-                return True
-            
-            # Check for meaningful substring matches (avoid false positives)
-            if _is_meaningful_substring_match(bone_lower, standard_lower):
-                print(f"BONE_CLASSIFICATION: '{bone_name}' is VRChat base bone (substring match: {standard_name})")
-                return True
+    for category, standard_name, standard_lower, standard_normalized in _STANDARD_BONE_FORMS:
+        # Check for meaningful substring matches (avoid false positives)
+        if _is_meaningful_substring_match(bone_lower, standard_lower):
+            print(f"BONE_CLASSIFICATION: '{bone_name}' is VRChat base bone (substring match: {standard_name})")
+            return True
     
     print(f"BONE_CLASSIFICATION: '{bone_name}' is custom/accessory bone")
     return False
@@ -110,16 +149,16 @@ def get_vrchat_opposite_bone(bone_name):
         return None
     
     bone_lower = bone_name.lower()
-    bone_normalized = bone_lower.replace(' ', '').replace('_', '').replace('.', '')
+    bone_normalized = _normalize_bone_name(bone_lower)
     
     print(f"🔍 GET_OPPOSITE: Looking for opposite of '{bone_name}' (normalized: '{bone_normalized}')")
     
     # Check each category for matches
-    for category, standard_names in VRCHAT_STANDARD_BONES.items():
-        for standard_name in standard_names:
-            standard_lower = standard_name.lower()
-            standard_normalized = standard_lower.replace(' ', '').replace('_', '').replace('.', '')
-            
+    for category, pattern, normalized_names, forms in _category_matchers():
+        # Skip the category unless one of its names matches (normalized) or occurs in the bone
+        if bone_normalized not in normalized_names and not pattern.search(bone_lower):
+            continue
+        for _, standard_name, standard_lower, standard_normalized in forms:
             # Check for exact, normalized, or substring match
             if (bone_lower == standard_lower or 
                 bone_normalized == standard_normalized or 
@@ -134,82 +173,83 @@ def get_vrchat_opposite_bone(bone_name):
     return None
 
 
+# Map categories to their opposites (built once, not on every lookup)
+_OPPOSITE_CATEGORIES = {
+    'arms_left': 'arms_right',
+    'arms_right': 'arms_left', 
+    'legs_left': 'legs_right',
+    'legs_right': 'legs_left',
+    'fingers_left': 'fingers_right',
+    'fingers_right': 'fingers_left',
+    
+    # LEG CATEGORY MAPPINGS (FIXED - was missing!)
+    'upper_leg_left': 'upper_leg_right',
+    'upper_leg_right': 'upper_leg_left',
+    'lower_leg_left': 'lower_leg_right', 
+    'lower_leg_right': 'lower_leg_left',
+    'foot_left': 'foot_right',
+    'foot_right': 'foot_left',
+    'toe_left': 'toe_right',
+    'toe_right': 'toe_left',
+    
+    # SHOULDER/ARM CATEGORY MAPPINGS
+    'shoulder_left': 'shoulder_right',
+    'shoulder_right': 'shoulder_left',
+    'upper_arm_left': 'upper_arm_right',
+    'upper_arm_right': 'upper_arm_left',
+    'forearm_left': 'forearm_right',
+    'forearm_right': 'forearm_left',
+    'hand_left': 'hand_right',
+    'hand_right': 'hand_left',
+    
+    # Detailed toe bone opposites
+    'toe_little_proximal_left': 'toe_little_proximal_right',
+    'toe_little_proximal_right': 'toe_little_proximal_left',
+    'toe_little_intermediate_left': 'toe_little_intermediate_right',
+    'toe_little_intermediate_right': 'toe_little_intermediate_left',
+    'toe_little_distal_left': 'toe_little_distal_right',
+    'toe_little_distal_right': 'toe_little_distal_left',
+    
+    'toe_ring_proximal_left': 'toe_ring_proximal_right',
+    'toe_ring_proximal_right': 'toe_ring_proximal_left',
+    'toe_ring_intermediate_left': 'toe_ring_intermediate_right',
+    'toe_ring_intermediate_right': 'toe_ring_intermediate_left',
+    'toe_ring_distal_left': 'toe_ring_distal_right',
+    'toe_ring_distal_right': 'toe_ring_distal_left',
+    
+    'toe_middle_proximal_left': 'toe_middle_proximal_right',
+    'toe_middle_proximal_right': 'toe_middle_proximal_left',
+    'toe_middle_intermediate_left': 'toe_middle_intermediate_right',
+    'toe_middle_intermediate_right': 'toe_middle_intermediate_left',
+    'toe_middle_distal_left': 'toe_middle_distal_right',
+    'toe_middle_distal_right': 'toe_middle_distal_left',
+    
+    'toe_index_proximal_left': 'toe_index_proximal_right',
+    'toe_index_proximal_right': 'toe_index_proximal_left',
+    'toe_index_intermediate_left': 'toe_index_intermediate_right',
+    'toe_index_intermediate_right': 'toe_index_intermediate_left',
+    'toe_index_distal_left': 'toe_index_distal_right',
+    'toe_index_distal_right': 'toe_index_distal_left',
+    
+    'toe_thumb_proximal_left': 'toe_thumb_proximal_right',
+    'toe_thumb_proximal_right': 'toe_thumb_proximal_left',
+    'toe_thumb_intermediate_left': 'toe_thumb_intermediate_right',
+    'toe_thumb_intermediate_right': 'toe_thumb_intermediate_left',
+    'toe_thumb_distal_left': 'toe_thumb_distal_right',
+    'toe_thumb_distal_right': 'toe_thumb_distal_left'
+}
+
+
 def _find_opposite_in_category(bone_name, category, matched_standard):
     """Find opposite bone within the same category"""
     print(f"🔍 FIND_OPPOSITE_CAT: Category '{category}', matched '{matched_standard}'")
     
-    # Map categories to their opposites
-    opposite_categories = {
-        'arms_left': 'arms_right',
-        'arms_right': 'arms_left', 
-        'legs_left': 'legs_right',
-        'legs_right': 'legs_left',
-        'fingers_left': 'fingers_right',
-        'fingers_right': 'fingers_left',
-        
-        # LEG CATEGORY MAPPINGS (FIXED - was missing!)
-        'upper_leg_left': 'upper_leg_right',
-        'upper_leg_right': 'upper_leg_left',
-        'lower_leg_left': 'lower_leg_right', 
-        'lower_leg_right': 'lower_leg_left',
-        'foot_left': 'foot_right',
-        'foot_right': 'foot_left',
-        'toe_left': 'toe_right',
-        'toe_right': 'toe_left',
-        
-        # SHOULDER/ARM CATEGORY MAPPINGS
-        'shoulder_left': 'shoulder_right',
-        'shoulder_right': 'shoulder_left',
-        'upper_arm_left': 'upper_arm_right',
-        'upper_arm_right': 'upper_arm_left',
-        'forearm_left': 'forearm_right',
-        'forearm_right': 'forearm_left',
-        'hand_left': 'hand_right',
-        'hand_right': 'hand_left',
-        
-        # Detailed toe bone opposites
-        'toe_little_proximal_left': 'toe_little_proximal_right',
-        'toe_little_proximal_right': 'toe_little_proximal_left',
-        'toe_little_intermediate_left': 'toe_little_intermediate_right',
-        'toe_little_intermediate_right': 'toe_little_intermediate_left',
-        'toe_little_distal_left': 'toe_little_distal_right',
-        'toe_little_distal_right': 'toe_little_distal_left',
-        
-        'toe_ring_proximal_left': 'toe_ring_proximal_right',
-        'toe_ring_proximal_right': 'toe_ring_proximal_left',
-        'toe_ring_intermediate_left': 'toe_ring_intermediate_right',
-        'toe_ring_intermediate_right': 'toe_ring_intermediate_left',
-        'toe_ring_distal_left': 'toe_ring_distal_right',
-        'toe_ring_distal_right': 'toe_ring_distal_left',
-        
-        'toe_middle_proximal_left': 'toe_middle_proximal_right',
-        'toe_middle_proximal_right': 'toe_middle_proximal_left',
-        'toe_middle_intermediate_left': 'toe_middle_intermediate_right',
-        'toe_middle_intermediate_right': 'toe_middle_intermediate_left',
-        'toe_middle_distal_left': 'toe_middle_distal_right',
-        'toe_middle_distal_right': 'toe_middle_distal_left',
-        
-        'toe_index_proximal_left': 'toe_index_proximal_right',
-        'toe_index_proximal_right': 'toe_index_proximal_left',
-        'toe_index_intermediate_left': 'toe_index_intermediate_right',
-        'toe_index_intermediate_right': 'toe_index_intermediate_left',
-        'toe_index_distal_left': 'toe_index_distal_right',
-        'toe_index_distal_right': 'toe_index_distal_left',
-        
-        'toe_thumb_proximal_left': 'toe_thumb_proximal_right',
-        'toe_thumb_proximal_right': 'toe_thumb_proximal_left',
-        'toe_thumb_intermediate_left': 'toe_thumb_intermediate_right',
-        'toe_thumb_intermediate_right': 'toe_thumb_intermediate_left',
-        'toe_thumb_distal_left': 'toe_thumb_distal_right',
-        'toe_thumb_distal_right': 'toe_thumb_distal_left'
-    }
-    
-    if category not in opposite_categories:
+    if category not in _OPPOSITE_CATEGORIES:
         # Core bones like spine, neck don't have opposites
         print(f"🔍 FIND_OPPOSITE_CAT: Category '{category}' has no opposite (core bone)")
         return None
     
-    opposite_category = opposite_categories[category]
+    opposite_category = _OPPOSITE_CATEGORIES[category]
     opposite_bones = VRCHAT_STANDARD_BONES[opposite_category]
     print(f"🔍 FIND_OPPOSITE_CAT: Looking in opposite category '{opposite_category}' with {len(opposite_bones)} bones")
     
@@ -313,18 +353,17 @@ def is_core_bone(bone_name):
     if not bone_name:
         return False
     
-    # Use existing bone classification logic to check if it's in the 'core' category
-    from ...bone_transforms.compatibility.vrchat_bones import VRCHAT_STANDARD_BONES
+    # Exact core names are a set probe
+    if is_bone_in_category(bone_name, 'core'):
+        print(f"BONE_CLASSIFICATION: '{bone_name}' is core bone (exact match)")
+        return True
     
+    # Use existing bone classification logic to check if it's in the 'core' category
     bone_lower = bone_name.lower()
-    bone_normalized = bone_lower.replace(' ', '').replace('_', '').replace('.', '')
+    bone_normalized = _normalize_bone_name(bone_lower)
     
     # Check core category
-    core_bones = VRCHAT_STANDARD_BONES.get('core', [])
-    for core_bone in core_bones:
-        core_lower = core_bone.lower()
-        core_normalized = core_lower.replace(' ', '').replace('_', '').replace('.', '')
-        
+    for _category, core_bone, core_lower, core_normalized in _CORE_BONE_FORMS:
         # Exact match or meaningful substring match
         if (bone_normalized == core_normalized or 
             _is_meaningful_substring_match(bone_lower, core_lower)):